@@ -0,0 +1,10 @@
+"""
+Throughput and memory benchmarks for syncable.
+
+    python -m benchmarks --rows 10000 100000 --change-ratio 0.1
+
+Runs every benchmark against a fresh SQLite database, prints items/sec, peak
+memory and query counts, and appends the results to
+benchmarks/results.jsonl together with the package version, so the numbers
+of one release can be compared with the last one (`--compare`).
+"""
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import django
+
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results.jsonl')
+
+
+def parse_args(argv):
+    from .suite import BENCHMARKS
+
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Benchmark syncable.')
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='benchmarks to run (default: all of %s)'
+                        % ', '.join(BENCHMARKS))
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000],
+                        help='row counts to run at, e.g. 10000 100000 1000000')
+    parser.add_argument('--change-ratio', type=float, default=0.1,
+                        help='share of source rows changed for incremental '
+                        'syncs (default 0.1)')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the peak memory run")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='JSON lines file results are appended to')
+    parser.add_argument('--label', default=None,
+                        help='label for this run (default: package version)')
+    parser.add_argument('--compare', metavar='LABEL', default=None,
+                        help='compare with the latest results labelled LABEL')
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+    return args
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def result_key(result):
+    return (result['benchmark'], result['rows'], result['change_ratio'])
+
+
+def format_result(result, baseline=None):
+    line = '%-24s %9d rows %12.0f items/s %8d queries' % (
+        result['benchmark'], result['rows'], result['items_per_sec'] or 0,
+        result['queries'])
+    if result['peak_memory'] is not None:
+        line += ' %9.1f MiB peak' % (result['peak_memory'] / 1024.0 / 1024)
+    if baseline and baseline['items_per_sec'] and result['items_per_sec']:
+        line += '  %+6.1f%% vs %s' % (
+            (result['items_per_sec'] / baseline['items_per_sec'] - 1) * 100,
+            baseline['label'])
+    return line
+
+
+def main(argv=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    from syncable.pkgmeta import __version__
+    from .suite import BENCHMARKS, run_benchmark
+
+    args = parse_args(argv)
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    baselines = {}
+    if args.compare:
+        for result in load_results(args.output):
+            if result.get('label') == args.compare:
+                baselines[result_key(result)] = result
+
+    environment = {
+        'label': args.label or __version__,
+        'version': __version__,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(args.output, 'a') as output:
+        for rows in args.rows:
+            for name in args.benchmarks or BENCHMARKS:
+                result = run_benchmark(name, rows, args.change_ratio,
+                                       memory=args.memory)
+                result.update(environment)
+                print(format_result(result, baselines.get(result_key(result))))
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
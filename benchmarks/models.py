@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class SourceRow(models.Model):
+    name = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    last_updated = models.IntegerField(default=0)
+
+
+class TargetRow(models.Model):
+    source_id = models.IntegerField(unique=True)
+    name = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    last_updated = models.IntegerField(default=0)
@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+SECRET_KEY = 'BENCHMARK'
+
+INSTALLED_APPS = ('syncable', 'benchmarks',)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'SYNCABLE_BENCHMARK_DB',
+            os.path.join(tempfile.mkdtemp(), 'benchmark.db')),
+    }
+}
+
+USE_TZ = True
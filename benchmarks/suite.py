@@ -0,0 +1,202 @@
+"""
+The benchmarks. Each one is a setup function taking the row count and
+change ratio and returning the callable to time, which returns the number
+of items it processed and how many of them were synced.
+"""
+from collections import OrderedDict
+import gc
+import time
+import tracemalloc
+
+from syncable.base import Collection, DictItem, ModelCollection, Syncable
+from syncable.models import Record
+from syncable.utils import QueryCounter, resolve_lookup
+
+
+def dict_mapping(source):
+    return {
+        'name': '%s %s' % (source.get('name.first'), source.get('name.last')),
+        'city': source.get('city'),
+        'last_updated': source.get('last_updated'),
+    }
+
+
+def model_mapping(source):
+    return {
+        'name': source.get('name'),
+        'city': source.get('city'),
+        'last_updated': source.get('last_updated'),
+    }
+
+
+def make_dict_rows(rows):
+    return [{'id': i,
+             'name': {'first': 'First%s' % i, 'last': 'Last%s' % i},
+             'city': 'City %s' % (i % 1000),
+             'last_updated': 0}
+            for i in range(rows)]
+
+
+def changed_indexes(rows, change_ratio):
+    changed = int(rows * change_ratio)
+    if not changed:
+        return []
+    return list(range(0, rows, rows // changed))[:changed]
+
+
+def populate_models(rows):
+    """
+    Fill the benchmark tables: `rows` source rows and no targets.
+    """
+    from .models import SourceRow, TargetRow
+
+    TargetRow.objects.all().delete()
+    Record.objects.all().delete()
+    if SourceRow.objects.count() != rows:
+        SourceRow.objects.all().delete()
+        SourceRow.objects.bulk_create(
+            [SourceRow(id=i, name='First%s Last%s' % (i, i),
+                       city='City %s' % (i % 1000))
+             for i in range(rows)], batch_size=10000)
+    else:
+        SourceRow.objects.update(last_updated=0)
+
+
+def make_syncable(kind):
+    if kind == 'dict':
+        class DictSyncable(Syncable):
+            source = Collection([], item_class=DictItem)
+            target = Collection([], item_class=DictItem)
+            mapping = [dict_mapping, ]
+            unique_lookup_key = ('id', 'id')
+        return DictSyncable
+
+    from .models import SourceRow, TargetRow
+
+    class ModelSyncable(Syncable):
+        source = ModelCollection(SourceRow)
+        target = ModelCollection(TargetRow)
+        mapping = [model_mapping, ]
+        unique_lookup_key = ('id', 'source_id')
+    return ModelSyncable
+
+
+def sync_benchmark(kind, mode):
+    """
+    full: nothing synced yet. incremental: everything synced, then
+    `change_ratio` of the source changed. forced: everything synced, then
+    synced again with force=True.
+    """
+    def setup(rows, change_ratio):
+        syncable = make_syncable(kind)()
+        if kind == 'dict':
+            Record.objects.all().delete()
+            data = make_dict_rows(rows)
+            syncable.source = Collection(data, item_class=DictItem)
+            syncable.target = Collection([], item_class=DictItem)
+        else:
+            populate_models(rows)
+
+        if mode != 'full':
+            syncable.sync().commit()
+            changed = changed_indexes(rows, change_ratio)
+            if kind == 'dict':
+                for i in changed:
+                    data[i]['last_updated'] += 1
+            elif changed:
+                from .models import SourceRow
+                SourceRow.objects.filter(pk__in=changed).update(
+                    last_updated=1)
+
+        def run():
+            target = syncable.sync(force=(mode == 'forced'))
+            target.commit()
+            return rows, len(syncable._updated)
+        return run
+    return setup
+
+
+def collection_get(rows, change_ratio):
+    collection = Collection(make_dict_rows(rows), item_class=DictItem)
+
+    def run():
+        for i in range(rows):
+            collection.get('id', i)
+        return rows, 0
+    return run
+
+
+def resolve_lookups(rows, change_ratio):
+    data = make_dict_rows(rows)
+
+    def run():
+        for row in data:
+            resolve_lookup('name.first', row)
+        return rows, 0
+    return run
+
+
+def model_commit(rows, change_ratio):
+    from .models import TargetRow
+
+    populate_models(0)
+    TargetRow.objects.bulk_create(
+        [TargetRow(source_id=i, name='Name', city='City')
+         for i in range(rows)], batch_size=10000)
+    collection = ModelCollection(TargetRow)
+    len(collection)
+
+    def run():
+        collection.commit()
+        return rows, rows
+    return run
+
+
+BENCHMARKS = OrderedDict([
+    ('sync-dict-full', sync_benchmark('dict', 'full')),
+    ('sync-dict-incremental', sync_benchmark('dict', 'incremental')),
+    ('sync-dict-forced', sync_benchmark('dict', 'forced')),
+    ('sync-model-full', sync_benchmark('model', 'full')),
+    ('sync-model-incremental', sync_benchmark('model', 'incremental')),
+    ('sync-model-forced', sync_benchmark('model', 'forced')),
+    ('collection-get', collection_get),
+    ('resolve-lookup', resolve_lookups),
+    ('model-commit', model_commit),
+])
+
+
+def run_benchmark(name, rows, change_ratio=0.1, memory=True):
+    """
+    Time one benchmark, then, if `memory`, run it again under tracemalloc
+    for its peak memory (tracing slows it down too much to do both at
+    once).
+    """
+    setup = BENCHMARKS[name]
+    run = setup(rows, change_ratio)
+    gc.collect()
+    with QueryCounter() as queries:
+        start = time.perf_counter()
+        items, synced = run()
+        seconds = time.perf_counter() - start
+
+    peak_memory = None
+    if memory:
+        run = setup(rows, change_ratio)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return OrderedDict([
+        ('benchmark', name),
+        ('rows', rows),
+        ('change_ratio', change_ratio),
+        ('seconds', seconds),
+        ('items_per_sec', items / seconds if seconds else None),
+        ('synced', synced),
+        ('queries', queries.count),
+        ('peak_memory', peak_memory),
+    ])
@@ -63,7 +63,7 @@ setup(
     version=pkgmeta['__version__'],
     author='Chris McKenzie',
     author_email='chrismc@hzdg.com',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     include_package_data=False,
     description='Django tool for syncing data',
     license='MIT',
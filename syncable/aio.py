@@ -0,0 +1,156 @@
+"""
+asyncio support. Kept out of `syncable.base` so the core classes don't depend
+on coroutine syntax.
+"""
+import asyncio
+import itertools
+import queue
+import threading
+
+from .base import Collection, DictItem
+
+
+_DONE = object()
+
+
+class AsyncCollection(Collection):
+    """
+    Collection fed by an async page fetcher, e.g. a paginated HTTP API.
+
+    >>> async def fetch_page(page):
+    ...     async with session.get(URL, params={'page': page}) as response:
+    ...         return (await response.json())['results']
+    >>> tweets = AsyncCollection(fetch_page, concurrency=4)
+
+    Pages are requested concurrently, at most `concurrency` at a time, and
+    their items are handed to the sync loop as each page arrives, so items
+    come out in arrival order rather than page order.
+    """
+    item_class = DictItem
+
+    def __init__(self, fetch_page, *args, **kwargs):
+        """
+        Args:
+            fetch_page: coroutine function taking a page number and returning
+                a list of data items. An empty list (or None) marks the end.
+
+            kwargs:
+                pages: optional iterable of pages to fetch, read once here.
+                    When given, every page is fetched and empty pages are
+                    simply skipped.
+                    Otherwise pages are counted up from `start_page` until a
+                    page comes back empty.
+                start_page: first page when `pages` isn't given. default 1
+                concurrency: max number of pages in flight. default 4
+        """
+        self.pages = kwargs.pop('pages', None)
+        if self.pages is not None:
+            # a generator would be used up by the first fetch or cache_key
+            self.pages = tuple(self.pages)
+        self.start_page = kwargs.pop('start_page', 1)
+        self.concurrency = kwargs.pop('concurrency', 4)
+        if self.concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        super(AsyncCollection, self).__init__(fetch_page, *args, **kwargs)
+        self.build_collection(fetch_page)
+
+    @property
+    def name(self):
+        fetch_page = self._fetch_page
+        return '%s.%s' % (fetch_page.__module__,
+                          getattr(fetch_page, '__qualname__',
+                                  fetch_page.__name__))
+
+    def all(self):
+        if self._loaded:
+            return self.data
+        return self._iter_items()
+
+    def refresh(self):
+        self._loaded = False
+
+    def cache_key(self):
+        return (self.__class__, self.item_class, self._fetch_page, self.pages,
+                self.start_page)
+
+    def find(self, *args, **kwargs):
+        self.load()
+        return super(AsyncCollection, self).find(*args, **kwargs)
+
+    def load(self):
+        """
+        Fetch every page. Called for you by anything that needs the whole
+        collection at once (`get`, `find`, `len`).
+        """
+        if not self._loaded:
+            for item in self._iter_items():
+                pass
+        return self.data
+
+    def build_collection(self, fetch_page):
+        self._raw = fetch_page
+        self._fetch_page = fetch_page
+        self._loaded = False
+        self.data = []
+
+    def __len__(self):
+        self.load()
+        return super(AsyncCollection, self).__len__()
+
+    def _iter_items(self):
+        pages = queue.Queue()
+        stop = threading.Event()
+        thread = threading.Thread(target=self._run, args=(pages, stop))
+        thread.daemon = True
+        thread.start()
+
+        self.data = []
+        try:
+            while True:
+                page = pages.get()
+                if page is _DONE:
+                    break
+                if isinstance(page, BaseException):
+                    raise page
+                for data_item in page:
+                    item = self.item_class(data_item)
+                    self.data.append(item)
+                    yield item
+            self._loaded = True
+            thread.join()
+        finally:
+            # Let the fetchers wind down if the consumer bailed out early.
+            stop.set()
+
+    def _run(self, pages, stop):
+        try:
+            asyncio.run(self._fetch_pages(pages, stop))
+        except BaseException as e:
+            pages.put(e)
+        else:
+            pages.put(_DONE)
+
+    async def _fetch_pages(self, pages, stop):
+        open_ended = self.pages is None
+        if open_ended:
+            numbers = itertools.count(self.start_page)
+        else:
+            numbers = iter(self.pages)
+        exhausted = asyncio.Event()
+
+        # `concurrency` workers share one page counter, which bounds the
+        # number of requests in flight.
+
+        async def worker():
+            while not stop.is_set() and not exhausted.is_set():
+                try:
+                    number = next(numbers)
+                except StopIteration:
+                    return
+                results = await self._fetch_page(number)
+                if results:
+                    pages.put(results)
+                elif open_ended:
+                    exhausted.set()
+
+        await asyncio.gather(*[worker() for _ in range(self.concurrency)])
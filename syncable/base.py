@@ -1,13 +1,20 @@
+import copy
 import inspect
+import time
 
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
+from django.db.models import F, Max, Min
+from django.db.models.functions import Abs, Mod
 
-from .exceptions import MultipleItemsReturned, LookupDoesNotExist
+from .exceptions import BudgetExceeded, MultipleItemsReturned, \
+    LookupDoesNotExist, PartitionLeaseLost
 from .models import Record
 from .signals import pre_item_sync, \
     post_item_sync, pre_collection_sync, post_collection_sync
-from .utils import resolve_lookup
+from .chunking import AdaptiveChunkSizer, FixedChunkSizer, \
+    iter_sized_chunks
+from .utils import key_range, partition_index, resolve_lookup
 
 
 class Item(object):
@@ -49,11 +56,28 @@ class Item(object):
     def set(self, key, value):
         raise NotImplementedError
 
+    def to_raw(self):
+        """
+        Picklable copy of the data, used to map items in other processes.
+        """
+        return self.data
+
+    @classmethod
+    def from_raw(cls, raw):
+        """
+        Rebuild an item from `to_raw` output.
+        """
+        return cls(raw)
+
 
 class Collection(object):
     """
     Collection assembles a list of Items.
     TODO: can Collection be generic too?
+
+    Items are only built when first needed, so declaring a collection (e.g.
+    as a Syncable class attribute) costs nothing. Each Syncable instance
+    works on its own `fresh` copy.
     """
     item_class = Item
 
@@ -68,22 +92,99 @@ class Collection(object):
             kwargs:
                 create_new: optional named param specifies if a new target item
                     should be created if it doesn't already exist. default True
+                name: optional name, used in `Record` keys. Defaults to the
+                    class name (the model name for model collections);
+                    records of unnamed in-memory collections are kept apart
+                    per syncable.
         """
         self.create_new = kwargs.get('create_new', True)
+        self._name = kwargs.get('name')
         if 'item_class' in kwargs:
             self.item_class = kwargs.get('item_class')
-        self.build_collection(data_collection)
+        self._raw = data_collection
+        self._data = None
+        self._indexes = {}
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.build_collection(self._raw)
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._indexes = {}
+
+    def fresh(self):
+        """
+        Return a copy that hasn't loaded anything yet. In-memory collections
+        are their own data, so they return themselves.
+        """
+        return self
+
+    def refresh(self):
+        """
+        Forget loaded items so they're rebuilt from the source data on next
+        use. Called at the start of every sync.
+        """
+        pass
+
+    def cache_key(self):
+        """
+        Identifies the data behind this collection, so collections reading
+        the same data can share a snapshot (see `syncable.cache`). None
+        means don't cache.
+        """
+        return (self.__class__, self.item_class, id(self._raw))
+
+    def overlaps(self, other):
+        """
+        Whether writing to this collection may change `other`'s data.
+        """
+        key = self.cache_key()
+        return key is not None and key == other.cache_key()
+
+    def loaded_size(self):
+        """
+        Number of items loaded so far, without loading anything.
+        """
+        return len(self._data) if self._data is not None else 0
 
     @property
     def name(self):
-        # A naive implementation
-        return '-'.join([str(data.__hash__()) for data in self.all()])
+        # Not derived from the items: it's part of every Record key, so it
+        # has to be cheap and stay the same when the data changes.
+        return self._name or self.__class__.__name__
 
     def all(self):
         return self.data
 
+    def iter_chunks(self, sizer):
+        """
+        Yield the items in lists sized by `sizer` (see `syncable.chunking`).
+        """
+        return iter_sized_chunks(self.all(), sizer)
+
+    def for_keys(self, lookup_key, values):
+        """
+        Return a collection to look up the items whose `lookup_key` is one
+        of `values` in. In-memory collections are already loaded, so they
+        return themselves.
+        """
+        return self
+
+    def add_items(self, items):
+        """
+        Add items built elsewhere, e.g. created in another copy of this
+        collection.
+        """
+        for item in items:
+            self.data.append(item)
+            self._index_item(item)
+
     def get(self, lookup_key, unique_identifier, *args, **kwargs):
-        results = list(filter(lambda x: x.get(lookup_key, '') == unique_identifier, self.data))
+        results = self.find(lookup_key, unique_identifier)
         if len(results) == 1:
             return results[0]
         elif len(results) > 1:
@@ -98,12 +199,118 @@ class Collection(object):
         lookups = {lookup_key: unique_identifier}
         item = self.create_item(lookups)
         self.data.append(item)
+        self._index_item(item)
         return item
 
+    def find(self, lookup_key, unique_identifier):
+        """
+        Return the items whose `lookup_key` equals `unique_identifier`.
+
+        The first lookup on a key builds an index of the collection by that
+        key, so a sync looks items up in constant time rather than scanning
+        the collection for each one. Lookup values changed by updating an
+        item aren't re-indexed, so don't map onto the lookup key.
+        """
+        index = self._get_index(lookup_key)
+        if index is not None:
+            try:
+                candidates = index.get(unique_identifier, [])
+            except TypeError:  # unhashable identifier
+                candidates = self.data
+        else:
+            candidates = self.data
+        return [item for item in candidates
+                if item.get(lookup_key, '') == unique_identifier]
+
+    def _get_index(self, lookup_key):
+        if lookup_key not in self._indexes:
+            index = {}
+            try:
+                for item in self.data:
+                    index.setdefault(item.get(lookup_key, ''), []).append(item)
+            except TypeError:  # unhashable value, scan instead
+                index = None
+            self._indexes[lookup_key] = index
+        return self._indexes[lookup_key]
+
+    def _index_item(self, item):
+        for lookup_key, index in self._indexes.items():
+            if index is None:
+                continue
+            try:
+                index.setdefault(item.get(lookup_key, ''), []).append(item)
+            except TypeError:
+                self._indexes[lookup_key] = None
+
     def create_item(self, lookup):
         return self.item_class(lookup)
 
+    def partition(self, lookup_key, index, count, strategy='hash',
+                  bounds=None):
+        """
+        Return a collection holding the `index`th of `count` disjoint
+        partitions of this one, split on the value of `lookup_key`.
+
+        Args:
+            strategy: 'hash' splits on a stable hash of the value, 'range'
+                splits the span of (integer) values into contiguous ranges.
+            bounds: (start, end) of the range, end exclusive, None for
+                open ended. Without it the range is worked out from the
+                current `key_bounds`.
+        """
+        items = list(self.all())
+        if strategy == 'hash':
+            return self._derive([
+                item for item in items
+                if partition_index(item.get(lookup_key), count) == index])
+        elif strategy == 'range':
+            if bounds is None:
+                extent = self.key_bounds(lookup_key)
+                if extent is None:
+                    return self._derive([])
+                bounds = key_range(extent[0], extent[1], index, count)
+            start, end = bounds
+            return self._derive([
+                item for item in items
+                if (start is None or start <= item.get(lookup_key)) and
+                (end is None or item.get(lookup_key) < end)])
+        raise ImproperlyConfigured(
+            "partition strategy must be 'hash' or 'range', not %r" % strategy)
+
+    def key_bounds(self, lookup_key):
+        """
+        (lowest, highest) value of `lookup_key`, or None when empty.
+        """
+        values = [item.get(lookup_key) for item in self.all()]
+        if not values:
+            return None
+        return min(values), max(values)
+
+    def filter_keys(self, lookup_key, values):
+        """
+        Return a collection of only the items whose `lookup_key` is one of
+        `values`.
+        """
+        values = set(values)
+        return self._derive([item for item in self.all()
+                             if item.get(lookup_key) in values])
+
+    def _derive(self, items):
+        """
+        A copy of this collection holding `items`.
+        """
+        collection = copy.copy(self)
+        collection.data = items
+        return collection
+
     def commit(self):
+        self.commit_items(self.data)
+
+    def commit_items(self, items):
+        """
+        Persist the given items. Lets callers commit part of a collection,
+        e.g. one chunk of a pipelined sync.
+        """
         pass
 
     def build_collection(self, data_collection):
@@ -138,6 +345,21 @@ class ModelItem(Item):
     def set(self, key, value):
         setattr(self.data, key, value)
 
+    def to_raw(self):
+        """
+        Field values only: related objects are reduced to their keys
+        (`author_id`), so mappers run from raw data can't follow relations.
+        """
+        obj = self.data
+        raw = dict((field.attname, getattr(obj, field.attname))
+                   for field in obj._meta.concrete_fields)
+        raw['pk'] = obj.pk
+        return raw
+
+    @classmethod
+    def from_raw(cls, raw):
+        return DictItem(raw)
+
 
 class ModelCollection(Collection):
     """
@@ -150,36 +372,173 @@ class ModelCollection(Collection):
 
     @property
     def name(self):
-        model = self.get_model()
-        return model.__name__
+        return self._name or self.get_model().__name__
 
     def get_model(self):
         return self._model
 
-    def commit(self):
-        for item in self.data:
+    def commit_items(self, items):
+        for item in items:
             try:
                 item.data.save()
             except Exception as e:
                 print('Error during sync, skipping.', e)
 
+    def __init__(self, data, *args, **kwargs):
+        super(ModelCollection, self).__init__(
+            self._get_queryset(data), *args, **kwargs)
+
+    def fresh(self):
+        return self._derive_queryset(self._raw)
+
+    def refresh(self):
+        self.data = None
+
+    def cache_key(self):
+        try:
+            query = str(self._raw.query)
+        except Exception:  # e.g. EmptyResultSet
+            return None
+        return (self.__class__, self.item_class, self._raw.db, query)
+
+    def overlaps(self, other):
+        # any queryset on the same table, or a parent or child table
+        if not isinstance(other, ModelCollection):
+            return False
+        model, other_model = self.get_model(), other.get_model()
+        return issubclass(model, other_model) or \
+            issubclass(other_model, model)
+
     def build_collection(self, data):
+        # Evaluate a clone so the stored queryset never caches results.
+        return super(ModelCollection, self).build_collection(
+            self._get_queryset(data)._clone())
+
+    def _get_queryset(self, data):
         if inspect.isclass(data) and issubclass(data, models.Model):
             queryset = data._default_manager.all()
             self._model = data
         elif isinstance(data, models.query.QuerySet):
             queryset = data
             self._model = data.model
-            if hasattr(queryset, '_clone'):
-                queryset = queryset._clone()
         else:
             raise ImproperlyConfigured("needs to be a model or queryset")
-
-        return super(ModelCollection, self).build_collection(queryset)
+        return queryset
 
     def create_item(self, lookup):
         return self.item_class(self._create_object(lookup))
 
+    def partition(self, lookup_key, index, count, strategy='hash',
+                  bounds=None):
+        """
+        Like `Collection.partition`, but filters the queryset so only this
+        partition is loaded. Both strategies need an integer lookup field.
+        """
+        field = lookup_key.replace('.', '__')
+        queryset = self._raw
+        if not isinstance(self._get_field(field), models.IntegerField):
+            raise ImproperlyConfigured(
+                '%s.%s: partitioned model collections need an integer '
+                'lookup field' % (self.get_model().__name__, field))
+        if strategy == 'hash':
+            # Abs, since Mod of a negative key is negative in SQL
+            queryset = queryset.annotate(
+                _syncable_partition=Abs(Mod(F(field), count))).filter(
+                _syncable_partition=index)
+        elif strategy == 'range':
+            if bounds is None:
+                extent = self.key_bounds(lookup_key)
+                if extent is None:
+                    return self._derive_queryset(queryset.none())
+                bounds = key_range(extent[0], extent[1], index, count)
+            start, end = bounds
+            if start is not None:
+                queryset = queryset.filter(**{'%s__gte' % field: start})
+            if end is not None:
+                queryset = queryset.filter(**{'%s__lt' % field: end})
+        else:
+            raise ImproperlyConfigured(
+                "partition strategy must be 'hash' or 'range', not %r"
+                % strategy)
+        return self._derive_queryset(queryset)
+
+    def _get_field(self, field):
+        """
+        The model field a `__` separated lookup ends at, following
+        relations.
+        """
+        model = self.get_model()
+        for name in field.split('__'):
+            if name == 'pk':
+                model_field = model._meta.pk
+            else:
+                model_field = model._meta.get_field(name)
+            if model_field.is_relation:
+                model = model_field.related_model
+                model_field = model._meta.pk
+        return model_field
+
+    def key_bounds(self, lookup_key):
+        field = lookup_key.replace('.', '__')
+        extent = self._raw.aggregate(lowest=Min(field), highest=Max(field))
+        if extent['lowest'] is None:
+            return None
+        return extent['lowest'], extent['highest']
+
+    def filter_keys(self, lookup_key, values):
+        field = lookup_key.replace('.', '__')
+        return self._derive_queryset(
+            self._raw.filter(**{'%s__in' % field: list(values)}))
+
+    def iter_chunks(self, sizer):
+        """
+        Read the queryset a chunk at a time, unless it's loaded already.
+        Pages are read by primary key, or by offset for querysets with an
+        ordering of their own.
+        """
+        if self._data is not None:
+            return super(ModelCollection, self).iter_chunks(sizer)
+        return self._iter_pages(sizer)
+
+    def _iter_pages(self, sizer):
+        queryset = self._raw
+        by_pk = not queryset.query.is_sliced and (
+            not queryset.ordered or
+            list(queryset.query.order_by) in (['pk'], ['id']))
+        if by_pk:
+            queryset = queryset.order_by('pk')
+        last, offset = None, 0
+        while True:
+            size = sizer.next_size()
+            if not by_pk:
+                page = queryset[offset:offset + size]
+            elif last is None:
+                page = queryset[:size]
+            else:
+                page = queryset.filter(pk__gt=last)[:size]
+            rows = list(page)
+            if not rows:
+                return
+            last, offset = rows[-1].pk, offset + len(rows)
+            yield [self.item_class(row) for row in rows]
+
+    def for_keys(self, lookup_key, values):
+        """
+        Unless the collection is loaded already, return a copy loading only
+        the rows for `values`.
+        """
+        if self._data is not None:
+            return self
+        return self.filter_keys(lookup_key, values)
+
+    def _derive_queryset(self, queryset):
+        # a copy, so subclasses keep whatever else they set up
+        collection = copy.copy(self)
+        collection._raw = queryset
+        collection._data = None
+        collection._indexes = {}
+        return collection
+
     def _create_object(self, lookup):
         """
         create a new instance of a model. Note: that instance hasn't been saved
@@ -194,7 +553,7 @@ class ModelSource(ModelCollection):
     """
     Almost pointless. Stops you from saving the source models on accident.
     """
-    def commit(self):
+    def commit_items(self, items):
         raise Exception('Unable to save source model.'
                         ' This is a safety precaution')
 
@@ -212,77 +571,406 @@ class RecordCheckMixin(object):
     Returns:
         Boolean
     value from a target item.
+
+    Chunked syncs `prefetch` the records of a whole chunk in a few queries
+    instead of fetching them one item at a time.
     """
+    # keys per query when prefetching records
+    record_batch_size = 500
+
+    def sync(self, *args, **kwargs):
+        # don't carry prefetched records over from the last sync
+        self._records = {}
+        return super(RecordCheckMixin, self).sync(*args, **kwargs)
+
     def should_sync(self, source_item, target_item):
-        record, created = Record.objects.get_or_create(
-            key=self._syncable_key(source_item))
-        if record.value == str(source_item.get(self.watch_key)):
+        record = self.get_record(source_item)
+        if record is not None and \
+                record.value == str(source_item.get(self.watch_key)):
             return False
         else:
             return True
 
+    def prefetch(self, source_items):
+        keys = [self._syncable_key(source_item)
+                for source_item in source_items]
+        self._records = dict((key, None) for key in keys)
+        for i in range(0, len(keys), self.record_batch_size):
+            batch = keys[i:i + self.record_batch_size]
+            for record in Record.objects.filter(key__in=batch):
+                self._records[record.key] = record
+
+    def get_record(self, source_item):
+        key = self._syncable_key(source_item)
+        records = getattr(self, '_records', {})
+        if key in records:
+            return records[key]
+        return Record.objects.filter(key=key).first()
+
     def post_item_sync(self, source_item, target_item):
         self.update_record(source_item, target_item)
 
     def update_record(self, source_item, target_item):
-        record = Record.objects.get(key=self._syncable_key(source_item))
+        record = self.get_record(source_item)
+        if record is None:
+            record = Record(key=self._syncable_key(source_item))
         record.value = str(source_item.get(self.watch_key))
         record.save()
+        if record.key in getattr(self, '_records', {}):
+            self._records[record.key] = record
 
 
 class BaseSyncable(object):
+    # how `sync(partition=i, of=n)` splits the source: 'hash' or 'range'
+    partition_strategy = 'hash'
+    # sync source model changes as they happen, see `syncable.push`
+    push = False
+    push_queue = None
+    # chunking of pipelined and process pool syncs: a number of items, or
+    # 'auto' to size chunks to take about `chunk_seconds` each while keeping
+    # them under `chunk_memory` bytes, see `syncable.chunking`
+    chunk_size = 'auto'
+    chunk_seconds = 1.0
+    chunk_memory = None
+    # budgets enforced by `SyncableRegistry.run`, see `syncable.budgets`.
+    # None means unlimited. `budget_action` is 'warn' or 'raise'.
+    max_queries_per_item = None
+    max_queries_per_chunk = None
+    max_seconds = None
+    budget_action = 'warn'
+    # counts this syncable's queries while run under a budget
+    _query_counter = None
+    # time.time() past which a sync under a raising budget stops
+    _deadline = None
+
+    def __init__(self, *args, **kwargs):
+        # Work on copies of the class's collections, so what one instance
+        # loads isn't seen by others.
+        seen = set()
+        for klass in self.__class__.__mro__:
+            for name, value in vars(klass).items():
+                if name not in seen and isinstance(value, Collection):
+                    setattr(self, name, value.fresh())
+                seen.add(name)
 
     def sync(self, *args, **kwargs):
         """
         gets the list of source items, iterates over to find analog in the
         target set and updates the target if needed. TODO: add complete sync
         transactional support? TODO: add signal
+
+        kwargs:
+            force: sync every item, whatever `should_sync` says.
+            pipeline: run reading, syncing and committing as overlapping
+                stages, see `syncable.pipeline`. The target is committed
+                chunk by chunk, so there's nothing left to commit afterwards.
+            processes: map chunks of items in a pool of this many
+                processes, see `syncable.parallel`.
+            chunk_size: items per chunk in pipelined or process mode, or
+                'auto'. defaults to the `chunk_size` attribute
+            queue_size: chunks buffered between pipeline stages. default 2
+            partition, of: only sync the `partition`th of `of` partitions of
+                the source, split by `partition_strategy`. A ModelCollection
+                target is narrowed to the same partition, or to the
+                partition's keys, and that narrowed target is returned.
+            bounds: the (start, end) key range of a 'range' partition, as
+                stored on its lease, see `sync_partitions`. Worked out from
+                the source when not given.
+            keys: only sync the source items with these unique lookup
+                values, see `syncable.push`.
+            cache: a `syncable.cache.SourceCache` to share the loaded source
+                with other syncables in the same run.
+            plan: don't sync, return a `syncable.plan.SyncPlan` of what a
+                sync would do instead.
         """
         self._updated = []
-        lookup_key = self.get_target_lookup_key()
+        self._committed = False
         self._force = kwargs.get('force', False)
+        sizer = self.get_chunk_sizer(kwargs.get('chunk_size'))
+        self.result = {'items': 0, 'updated': 0, 'chunks': sizer.history}
 
-        # get the list of source items
-        source = self.get_source()
-        pre_collection_sync.send(
-            sender=self.__class__, source=source, target=self.target)
-        for source_item in source.all():
-            # unique_identifier is a value which is common between the source
-            # and target
-            unique_identifier = self.get_unique_lookup_value(source_item)
-            # get
-            target_item = self.target.get(lookup_key, unique_identifier)
-            if target_item is None:
-                continue
+        if kwargs.get('of') and self.partition_strategy == 'range' and \
+                kwargs.get('bounds') is None:
+            # the same range for the source and the target
+            kwargs['bounds'] = self._range_bounds(
+                kwargs.get('partition', 0), kwargs['of'])
 
-            # determine if target should sync with source
-            if self.should_sync(source_item, target_item) or self._force:
-                # Hook: before sync
-                pre_item_sync.send(sender=self.__class__,
-                                   source=source_item, target=target_item)
-                self.pre_item_sync(source_item, target_item)
-                # Update the target
-                updated_target_item = self.update_target(
-                    source_item, target_item, *args, **kwargs)
-                self._updated.append(updated_target_item)
-                # Hook: after sync
-                self.post_item_sync(source_item, target_item)
-                post_item_sync.send(sender=self.__class__,
-                                    source=source_item, target=target_item)
+        # get the list of source items
+        source = self._get_sync_source(**kwargs)
+        target = self._get_sync_target(source, **kwargs)
+        if kwargs.get('plan', False):
+            from .plan import build_plan
+            return build_plan(self, source, sizer, target)
 
+        pre_collection_sync.send(
+            sender=self.__class__, source=source, target=target)
+        mapper = None
+        if kwargs.get('processes'):
+            from .parallel import ProcessMapper
+            mapper = ProcessMapper(self.mapping, kwargs['processes'])
+        try:
+            if kwargs.get('pipeline', False):
+                from .pipeline import run_pipeline
+                run_pipeline(self, source, mapper, sizer, *args,
+                             target=target, **kwargs)
+                self._committed = True
+            elif mapper is not None:
+                lookup_key = self.get_target_lookup_key()
+                for chunk in iter_sized_chunks(source.all(), sizer):
+                    self._check_deadline()
+                    start = time.time()
+                    queries = self._count_queries()
+                    self._sync_chunk(chunk, lookup_key, mapper, *args,
+                                     target=target, **kwargs)
+                    self.result['items'] += len(chunk)
+                    sizer.record(len(chunk), time.time() - start, chunk[0],
+                                 self._count_queries(queries))
+            else:
+                lookup_key = self.get_target_lookup_key()
+                for source_item in source.all():
+                    self._check_deadline()
+                    self._sync_item(source_item, lookup_key, *args,
+                                    target=target, **kwargs)
+                    self.result['items'] += 1
+        finally:
+            if mapper is not None:
+                mapper.close()
+
+        self.result['updated'] = len(self._updated)
         post_collection_sync.send(
-            sender=self.__class__, source=source, target=self.target,
+            sender=self.__class__, source=source, target=target,
             updated=self._updated)
-        return self.target
+        return target
+
+    def _get_sync_source(self, **kwargs):
+        """
+        The source collection to sync, reloaded so a long lived syncable
+        never works from stale data, and narrowed down by the `partition`
+        and `keys` options.
+        """
+        source = self.get_source()
+        if kwargs.get('cache') is not None:
+            source = kwargs['cache'].get(source)
+        else:
+            source.refresh()
+        self.target.refresh()
+        if kwargs.get('of'):
+            source = source.partition(
+                self.get_source_lookup_key(), kwargs.get('partition', 0),
+                kwargs['of'], self.partition_strategy,
+                bounds=kwargs.get('bounds'))
+        if kwargs.get('keys') is not None:
+            source = source.filter_keys(
+                self.get_source_lookup_key(), kwargs['keys'])
+        return source
+
+    def _get_sync_target(self, source, **kwargs):
+        """
+        The target to sync into. For a partitioned sync a ModelCollection
+        target is narrowed to the source's partition, so workers don't each
+        load the whole target: to the same partition when its lookup field
+        is an integer, otherwise to the keys of the partition's items.
+        """
+        target = self.target
+        if not kwargs.get('of') or not isinstance(target, ModelCollection):
+            return target
+        lookup_key = self.get_target_lookup_key()
+        try:
+            return target.partition(
+                lookup_key, kwargs.get('partition', 0), kwargs['of'],
+                self.partition_strategy, bounds=kwargs.get('bounds'))
+        except ImproperlyConfigured:
+            return target.for_keys(lookup_key, [
+                self.get_unique_lookup_value(source_item)
+                for source_item in source.all()])
+
+    def _range_bounds(self, partition, of):
+        extent = self.get_source().key_bounds(self.get_source_lookup_key())
+        if extent is None:
+            return (0, 0)
+        return key_range(extent[0], extent[1], partition, of)
+
+    def prefetch(self, source_items):
+        """
+        Called with each chunk of source items before they're synced, to
+        load whatever `should_sync` needs for all of them at once.
+        """
+        pass
+
+    def _count_queries(self, since=None):
+        """
+        Queries this thread ran so far (minus `since`) when run under a
+        budget, otherwise None.
+        """
+        if self._query_counter is None:
+            return None
+        return self._query_counter.thread_count() - (since or 0)
+
+    def _check_deadline(self):
+        """
+        Stop a sync that has run past its `max_seconds` budget, when run
+        under a budget with `budget_action = 'raise'`.
+        """
+        if self._deadline is not None and time.time() > self._deadline:
+            raise BudgetExceeded('%s took longer than its %ss budget' % (
+                self.__class__.__name__, self.max_seconds))
+
+    def get_chunk_sizer(self, chunk_size=None):
+        chunk_size = chunk_size or self.chunk_size
+        if chunk_size == 'auto':
+            return AdaptiveChunkSizer(target_seconds=self.chunk_seconds,
+                                      max_memory=self.chunk_memory)
+        return FixedChunkSizer(chunk_size)
+
+    def _sync_item(self, source_item, lookup_key, *args, **kwargs):
+        """
+        Sync a single source item into its target analog. Returns the updated
+        target item, or None if nothing was synced.
+        """
+        target = kwargs.pop('target', None)
+        target_item = self._match_item(source_item, lookup_key, target)
+        if target_item is None:
+            return None
+        return self._apply_item(source_item, target_item, None,
+                                *args, **kwargs)
+
+    def _sync_chunk(self, chunk, lookup_key, mapper, *args, **kwargs):
+        """
+        Sync a list of source items and return the updated target items.
+
+        With a `mapper`, every item is matched first so the ones that need
+        syncing can be mapped in one go.
+        """
+        self.prefetch(chunk)
+        # the collection to find target items in, e.g. just this chunk's
+        target = kwargs.pop('target', None)
+        if mapper is None:
+            updated = []
+            for source_item in chunk:
+                target_item = self._match_item(
+                    source_item, lookup_key, target)
+                if target_item is not None:
+                    updated.append(self._apply_item(
+                        source_item, target_item, None, *args, **kwargs))
+            return [item for item in updated if item is not None]
+
+        matched = []
+        for source_item in chunk:
+            target_item = self._match_item(source_item, lookup_key, target)
+            if target_item is not None:
+                matched.append((source_item, target_item))
+
+        mapped = mapper.map([source_item for source_item, _ in matched])
+        return [self._apply_item(source_item, target_item, map_dict,
+                                 *args, **kwargs)
+                for (source_item, target_item), map_dict
+                in zip(matched, mapped)]
+
+    def _match_item(self, source_item, lookup_key, target=None):
+        """
+        Return the target item `source_item` should be synced into, or None
+        if it shouldn't be synced. It's looked up in `target`, defaulting
+        to the syncable's.
+        """
+        if target is None:
+            target = self.target
+        # unique_identifier is a value which is common between the source
+        # and target
+        unique_identifier = self.get_unique_lookup_value(source_item)
+        # get
+        target_item = target.get(lookup_key, unique_identifier)
+        if target_item is None:
+            return None
+
+        # determine if target should sync with source
+        if not (self.should_sync(source_item, target_item) or self._force):
+            return None
+        return target_item
+
+    def _apply_item(self, source_item, target_item, map_dict,
+                    *args, **kwargs):
+        # Hook: before sync
+        pre_item_sync.send(sender=self.__class__,
+                           source=source_item, target=target_item)
+        self.pre_item_sync(source_item, target_item)
+        # Update the target
+        if map_dict is not None:
+            kwargs['mapped'] = map_dict
+        updated_target_item = self.update_target(
+            source_item, target_item, *args, **kwargs)
+        self._updated.append(updated_target_item)
+        # Hook: after sync
+        self.post_item_sync(source_item, target_item)
+        post_item_sync.send(sender=self.__class__,
+                            source=source_item, target=target_item)
+        return updated_target_item
+
+    def sync_partitions(self, of, owner=None, lease_seconds=300,
+                        *args, **kwargs):
+        """
+        Claim partitions of this syncable (see `syncable.partitions`), sync
+        and commit each, until none are left. Run it from as many processes
+        or nodes as you like; each partition is synced once per round.
+        Returns the partitions synced here.
+
+        Leases aren't renewed while a partition syncs, so `lease_seconds`
+        must be longer than syncing one partition takes. If a lease runs
+        out and another worker claims the partition, `PartitionLeaseLost`
+        is raised, before committing if it's noticed in time.
+        """
+        from .partitions import claim_partition, complete_partition, \
+            renew_partition
+
+        def key_bounds():
+            return self.get_source().key_bounds(self.get_source_lookup_key())
+
+        # Range bounds are fixed when the leases are created, so every
+        # worker splits the keys the same way even if rows are added later.
+        bounds = key_bounds if self.partition_strategy == 'range' else None
+        synced = []
+        while True:
+            lease = claim_partition(self.get_name(), of, owner=owner,
+                                    lease_seconds=lease_seconds,
+                                    bounds=bounds)
+            if lease is None:
+                return synced
+            target = self.sync(*args, partition=lease.partition, of=of,
+                               bounds=(lease.range_start, lease.range_end),
+                               **kwargs)
+            if not self._committed:
+                if not renew_partition(lease, lease_seconds):
+                    raise PartitionLeaseLost(lease)
+                # Only what this partition changed: the rest of the target
+                # was loaded before other workers committed theirs.
+                target.commit_items(self._updated)
+            if not complete_partition(lease):
+                raise PartitionLeaseLost(lease)
+            synced.append(lease.partition)
+
+    def get_name(self):
+        """
+        Stable name for this syncable, used to key leases and push queues.
+        """
+        return '%s.%s' % (self.__class__.__module__, self.__class__.__name__)
 
     def update_target(self, source_item, target_item, *args, **kwargs):
-        map_dict = {}
-        for mapping in self.mapping:
-            map_dict.update(mapping(source_item))
+        """
+        Apply the mapping to `target_item`. If the item was already mapped
+        (e.g. in a process pool) the result is passed in as `mapped`.
+        """
+        map_dict = kwargs.get('mapped')
+        if map_dict is None:
+            map_dict = self.get_mapped(source_item)
 
         target_item.update(map_dict)
         return target_item
 
+    def get_mapped(self, source_item):
+        map_dict = {}
+        for mapping in self.mapping:
+            map_dict.update(mapping(source_item))
+        return map_dict
+
     def get_source(self):
         """
         Return source collection of source items which will be iterated over
@@ -343,12 +1031,20 @@ class BaseSyncable(object):
 
     def _syncable_key(self, source_item, *args, **kwargs):
         return "%s__%s__%s" % (
-            self.source.name,
-            self.target.name,
+            self._collection_name(self.source),
+            self._collection_name(self.target),
             self.serialize_unique_lookup(
                 self.get_unique_lookup_value(source_item))
         )
 
+    def _collection_name(self, collection):
+        # An unnamed in-memory collection only has its class name, which
+        # other syncables' collections share.
+        if collection._name is None and \
+                type(collection).name is Collection.name:
+            return '%s.%s' % (self.get_name(), collection.name)
+        return collection.name
+
     def _get_lookup_key(self, lookup_key, kind):
         if lookup_key == '':
             raise Exception('%s key can\'t be an empty string' % kind)
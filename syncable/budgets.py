@@ -0,0 +1,101 @@
+"""
+Query and time budgets.
+
+A Syncable can declare how much a sync may cost:
+
+>>> class ContactSyncable(Syncable):
+...     max_queries_per_item = 2
+...     max_queries_per_chunk = 10
+...     max_seconds = 600
+...     budget_action = 'raise'  # default 'warn'
+
+`SyncableRegistry.run` runs every sync and commit through `run_syncable`,
+which counts queries with an execute wrapper on the connection (pipeline
+stage threads count theirs too) and checks the totals afterwards. Exceeding
+a budget warns with a `BudgetWarning`, or raises `BudgetExceeded` after the
+sync has been committed.
+
+Chunk budgets apply to each chunk of a chunked sync (`pipeline`,
+`processes` or `plan`); a plain item by item sync counts as one chunk. With
+`budget_action = 'raise'` the time budget is also checked between items or
+chunks, so a runaway sync stops without being committed (pipelined syncs
+keep the chunks already committed).
+
+Only `run_syncable` enforces budgets: calling `sync` directly, and push
+mode's `flush` and `sync_keys`, aren't counted or checked at all.
+"""
+import time
+import warnings
+
+from .exceptions import BudgetExceeded, BudgetWarning
+from .utils import QueryCounter
+
+
+def run_syncable(syncable, **options):
+    """
+    Sync and commit `syncable` under its budget. Returns what `sync`
+    returned. The query count and time end up in `syncable.result`.
+    """
+    counter = QueryCounter()
+    syncable._query_counter = counter
+    start = time.time()
+    if syncable.budget_action == 'raise' and syncable.max_seconds is not None:
+        syncable._deadline = start + syncable.max_seconds
+    try:
+        with counter:
+            target = syncable.sync(**options)
+            if options.get('plan', False):
+                return target
+            if not syncable._committed:
+                target.commit()
+    finally:
+        syncable._query_counter = None
+        syncable._deadline = None
+    seconds = time.time() - start
+
+    syncable.result['queries'] = counter.count
+    syncable.result['seconds'] = seconds
+    check_budget(syncable, syncable.result)
+    return target
+
+
+def check_budget(syncable, result):
+    """
+    Compare a sync `result` with the syncable's budget, and warn or raise
+    as `budget_action` says. Returns the violations.
+    """
+    violations = budget_violations(syncable, result)
+    result['violations'] = violations
+    if violations:
+        message = '%s over budget: %s' % (
+            syncable.__class__.__name__, '; '.join(violations))
+        if syncable.budget_action == 'raise':
+            raise BudgetExceeded(message)
+        warnings.warn(message, BudgetWarning)
+    return violations
+
+
+def budget_violations(syncable, result):
+    violations = []
+    items = result.get('items', 0)
+    if syncable.max_queries_per_item is not None and items:
+        per_item = float(result['queries']) / items
+        if per_item > syncable.max_queries_per_item:
+            violations.append('%.2f queries per item, budget %s' % (
+                per_item, syncable.max_queries_per_item))
+
+    if syncable.max_queries_per_chunk is not None:
+        counted = [chunk['queries'] for chunk in result.get('chunks', [])
+                   if 'queries' in chunk]
+        if not counted:
+            # an item by item sync is one chunk
+            counted = [result['queries']]
+        if max(counted) > syncable.max_queries_per_chunk:
+            violations.append('%s queries in a chunk, budget %s' % (
+                max(counted), syncable.max_queries_per_chunk))
+
+    if syncable.max_seconds is not None and \
+            result['seconds'] > syncable.max_seconds:
+        violations.append('took %.1fs, budget %ss' % (
+            result['seconds'], syncable.max_seconds))
+    return violations
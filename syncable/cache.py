@@ -0,0 +1,79 @@
+"""
+Per-run cache of loaded source collections.
+
+Syncables reading the same source (say, one Salesforce table feeding three
+targets) would each load it in full. Within one `SyncableRegistry.run` they
+share a `SourceCache` instead: the first syncable loads the source and the
+others reuse the same snapshot, lookup indexes included. Collections are
+matched by `Collection.cache_key`, e.g. model and SQL for a ModelCollection.
+
+The cache holds at most `max_items` loaded items in total and evicts the
+least recently used snapshots to stay under it, including sources bigger
+than the cap on their own. Sources are counted as they're loaded, never
+loaded just to size them, so streaming sources like `AsyncCollection` still
+hand items over as they arrive.
+
+After a syncable commits, every snapshot its target may have changed is
+dropped (see `Collection.overlaps`), e.g. any queryset on the same model.
+"""
+from collections import OrderedDict
+
+
+class SourceCache(object):
+    def __init__(self, max_items=None):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._snapshots = OrderedDict()
+
+    def get(self, collection):
+        """
+        Return the loaded snapshot of `collection`'s data, loading and
+        storing `collection` itself on a miss.
+        """
+        key = collection.cache_key()
+        if key is None:
+            collection.refresh()
+            return collection
+
+        if key in self._snapshots:
+            self.hits += 1
+            snapshot = self._snapshots.pop(key)
+            self._snapshots[key] = snapshot
+            return snapshot
+
+        self.misses += 1
+        collection.refresh()
+        # Sized later, once loaded; the others may have grown since.
+        self._evict()
+        self._snapshots[key] = collection
+        return collection
+
+    def invalidate(self, collection=None):
+        """
+        Drop every snapshot whose data writing to `collection` may have
+        changed, or every snapshot.
+        """
+        if collection is None:
+            self._snapshots.clear()
+            return
+        for key, snapshot in list(self._snapshots.items()):
+            if collection.overlaps(snapshot):
+                del self._snapshots[key]
+
+    def __len__(self):
+        """
+        Number of cached items loaded so far.
+        """
+        return sum(snapshot.loaded_size()
+                   for snapshot in self._snapshots.values())
+
+    def __contains__(self, collection):
+        key = collection.cache_key()
+        return key is not None and key in self._snapshots
+
+    def _evict(self):
+        if self.max_items is None:
+            return
+        while len(self) > self.max_items:
+            self._snapshots.popitem(last=False)
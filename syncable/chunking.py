@@ -0,0 +1,84 @@
+"""
+Chunk sizing for the chunked sync paths (pipelined and process pool syncs).
+
+`FixedChunkSizer` always hands out the same size. `AdaptiveChunkSizer`
+starts small and, after each chunk, scales the size by how far the chunk's
+time was from `target_seconds`, at most doubling or halving per step so one
+odd chunk can't swing it wildly. Given `max_memory` it also keeps a chunk's
+estimated size in memory under that many bytes. Both keep a history of the
+sizes and timings for the sync result.
+"""
+import itertools
+import sys
+import threading
+
+
+class FixedChunkSizer(object):
+    def __init__(self, size):
+        self.size = size
+        self.history = []
+        self._lock = threading.Lock()
+
+    def next_size(self):
+        return self.size
+
+    def record(self, size, seconds, sample=None, queries=None):
+        """
+        Report that a chunk of `size` items took `seconds` (and `queries`,
+        if counted). `sample` is one of its source items, for memory
+        estimates.
+        """
+        entry = {'size': size, 'seconds': seconds}
+        if queries is not None:
+            entry['queries'] = queries
+        with self._lock:
+            self.history.append(entry)
+
+
+class AdaptiveChunkSizer(FixedChunkSizer):
+    def __init__(self, target_seconds=1.0, max_memory=None, initial=100,
+                 min_size=1, max_size=10000):
+        super(AdaptiveChunkSizer, self).__init__(initial)
+        self.target_seconds = target_seconds
+        self.max_memory = max_memory
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def record(self, size, seconds, sample=None, queries=None):
+        super(AdaptiveChunkSizer, self).record(size, seconds, sample, queries)
+        if seconds > 0:
+            factor = min(max(self.target_seconds / seconds, 0.5), 2.0)
+        else:
+            factor = 2.0
+        new_size = int(size * factor)
+        if self.max_memory and sample is not None:
+            new_size = min(new_size,
+                           self.max_memory // max(item_size(sample), 1))
+        with self._lock:
+            self.size = min(max(new_size, self.min_size), self.max_size)
+
+
+def iter_sized_chunks(iterable, sizer):
+    """
+    Yield lists of items from `iterable`, asking `sizer` for each chunk's
+    size.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, sizer.next_size()))
+        if not chunk:
+            return
+        yield chunk
+
+
+def item_size(item):
+    """
+    Rough size in bytes of an item's data: the container plus its values,
+    one level deep.
+    """
+    data = item.data
+    if not isinstance(data, dict):
+        data = getattr(data, '__dict__', {})
+    return sys.getsizeof(data) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value)
+        for key, value in data.items())
@@ -12,3 +12,18 @@ class LookupDoesNotExist(Exception):
 
 class MultipleItemsReturned(Exception):
     pass
+
+
+class PartitionLeaseLost(Exception):
+    """
+    A partition's lease expired and another worker claimed it.
+    """
+    pass
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class BudgetWarning(UserWarning):
+    pass
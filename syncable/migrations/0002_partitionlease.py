@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncable', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartitionLease',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('syncable', models.CharField(max_length=255)),
+                ('partition', models.PositiveIntegerField()),
+                ('of', models.PositiveIntegerField()),
+                ('owner', models.CharField(blank=True, default='', max_length=255)),
+                ('expires', models.DateTimeField(blank=True, null=True)),
+                ('completed', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='partitionlease',
+            unique_together=set([('syncable', 'partition', 'of')]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncable', '0002_partitionlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('syncable', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='queuedkey',
+            unique_together=set([('syncable', 'key')]),
+        ),
+    ]
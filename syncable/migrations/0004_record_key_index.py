@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncable', '0003_queuedkey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='record',
+            name='key',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
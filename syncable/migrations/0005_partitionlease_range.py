@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('syncable', '0004_record_key_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partitionlease',
+            name='range_start',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='partitionlease',
+            name='range_end',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
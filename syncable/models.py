@@ -2,8 +2,46 @@ from django.db import models
 
 
 class Record(models.Model):
-    key = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, db_index=True)
     value = models.TextField(default='')
 
     def __unicode__(self):
         return "key: %s, value: %s" % (self.key, self.value)
+
+
+class PartitionLease(models.Model):
+    """
+    Work claim for one partition of a partitioned sync, so several workers
+    (or nodes sharing the database) can split a syncable between them. See
+    `syncable.partitions`.
+    """
+    syncable = models.CharField(max_length=255)
+    partition = models.PositiveIntegerField()
+    of = models.PositiveIntegerField()
+    owner = models.CharField(max_length=255, blank=True, default='')
+    expires = models.DateTimeField(null=True, blank=True)
+    completed = models.DateTimeField(null=True, blank=True)
+    # key range of a 'range' partition, end exclusive, None for open ended
+    range_start = models.BigIntegerField(null=True, blank=True)
+    range_end = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('syncable', 'partition', 'of')
+
+    def __unicode__(self):
+        return "%s: %s of %s" % (self.syncable, self.partition, self.of)
+
+
+class QueuedKey(models.Model):
+    """
+    Source key waiting to be synced by a push syncable, see `syncable.push`.
+    Keys are JSON encoded so they come back with their original type.
+    """
+    syncable = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ('syncable', 'key')
+
+    def __unicode__(self):
+        return "%s: %s" % (self.syncable, self.key)
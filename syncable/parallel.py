@@ -0,0 +1,69 @@
+"""
+Map source items in a process pool, for mappings that do real CPU work.
+
+Workers never see ORM objects: each source item is reduced to picklable raw
+data with `Item.to_raw`, rebuilt in the worker with `Item.from_raw`, and only
+the mapped dicts come back. The mapping callables themselves are pickled too,
+so they have to be importable module level functions.
+
+Workers are started by a fork server rather than forked from the syncing
+process, which may be running other threads (e.g. pipeline stages) holding
+locks a forked child would inherit. They set Django up from the inherited
+`DJANGO_SETTINGS_MODULE` before unpickling any items.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+
+import django
+
+
+def map_raw_items(mapping, item_class, raw_items):
+    """
+    Worker: rebuild the items and run them through the mapping.
+    """
+    results = []
+    for raw in raw_items:
+        source_item = item_class.from_raw(raw)
+        map_dict = {}
+        for mapper in mapping:
+            map_dict.update(mapper(source_item))
+        results.append(map_dict)
+    return results
+
+
+class ProcessMapper(object):
+    """
+    Maps lists of source items across `processes` worker processes. Results
+    come back in the order the items went in.
+    """
+    def __init__(self, mapping, processes):
+        self.mapping = list(mapping)
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context(),
+            initializer=django.setup)
+
+    def map(self, source_items):
+        if not source_items:
+            return []
+        item_class = source_items[0].__class__
+        raw_items = [source_item.to_raw() for source_item in source_items]
+        # One slice per process keeps pickling overhead to a task apiece.
+        size = -(-len(raw_items) // self.processes)
+        slices = [raw_items[i:i + size]
+                  for i in range(0, len(raw_items), size)]
+        results = self._executor.map(
+            map_raw_items, itertools.repeat(self.mapping),
+            itertools.repeat(item_class), slices)
+        return list(itertools.chain.from_iterable(results))
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def get_context():
+    try:
+        return multiprocessing.get_context('forkserver')
+    except ValueError:  # not on this platform, e.g. Windows, which spawns
+        return None
@@ -0,0 +1,123 @@
+"""
+Database backed work claims for partitioned syncs.
+
+Each partition of a syncable has a `PartitionLease` row. A worker claims a
+partition by setting itself as owner with an expiry, using a conditional
+UPDATE so only one worker can win, even across nodes sharing the database.
+A worker that crashes simply lets its lease expire and the partition becomes
+claimable again. Completed partitions aren't handed out again until
+`reset_partitions` starts a new round.
+
+For 'range' partitions the key bounds are worked out once, when a round's
+leases are created, and stored on them, so every worker splits the same way.
+
+>>> lease = claim_partition('myapp.syncables.ContactSyncable', of=8)
+>>> syncable = ContactSyncable()
+>>> syncable.sync(partition=lease.partition, of=8)
+>>> syncable.target.commit_items(syncable._updated)
+>>> complete_partition(lease)
+
+`BaseSyncable.sync_partitions` does all of this in a loop.
+"""
+import datetime
+import os
+import socket
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PartitionLease
+from .utils import key_range
+
+
+def default_owner():
+    return '%s:%s' % (socket.gethostname(), os.getpid())
+
+
+def claim_partition(name, of, owner=None, lease_seconds=300, bounds=None):
+    """
+    Lease a pending partition of `name`. Returns the `PartitionLease`, or
+    None if every partition is either leased or completed.
+
+    Args:
+        bounds: for 'range' partitions, a callable returning the (lowest,
+            highest) key, or None when there are none. Only called when
+            the round's leases are created.
+    """
+    owner = owner or default_owner()
+    leases = PartitionLease.objects.filter(syncable=name, of=of)
+    if leases.count() < of:
+        _create_leases(name, of, bounds)
+
+    now = timezone.now()
+    claimable = Q(completed__isnull=True) & (
+        Q(expires__isnull=True) | Q(expires__lte=now))
+    expires = now + datetime.timedelta(seconds=lease_seconds)
+    for lease in leases.filter(claimable).order_by('partition'):
+        # Someone else may have claimed it since we looked, so only take it
+        # if it's still claimable.
+        claimed = leases.filter(claimable, pk=lease.pk).update(
+            owner=owner, expires=expires)
+        if claimed:
+            lease.owner = owner
+            lease.expires = expires
+            return lease
+    return None
+
+
+def renew_partition(lease, lease_seconds=300):
+    """
+    Extend a lease for long running partitions. Returns False if the lease
+    was lost, i.e. it expired and someone else claimed it.
+    """
+    expires = timezone.now() + datetime.timedelta(seconds=lease_seconds)
+    renewed = PartitionLease.objects.filter(
+        pk=lease.pk, owner=lease.owner, completed__isnull=True).update(
+        expires=expires)
+    if renewed:
+        lease.expires = expires
+    return bool(renewed)
+
+
+def complete_partition(lease):
+    """
+    Mark a leased partition done. Returns False if the lease was lost, in
+    which case someone else is syncing the partition.
+    """
+    return bool(PartitionLease.objects.filter(
+        pk=lease.pk, owner=lease.owner, completed__isnull=True).update(
+        completed=timezone.now(), expires=None))
+
+
+def reset_partitions(name, of):
+    """
+    Start a new round: make every partition of `name` claimable again. The
+    leases are created afresh, so range bounds are worked out again.
+    """
+    PartitionLease.objects.filter(syncable=name, of=of).delete()
+
+
+def _create_leases(name, of, bounds=None):
+    ranges = [(None, None)] * of
+    if bounds is not None:
+        extent = bounds()
+        if extent is None:
+            # nothing to split yet; whatever turns up goes in the first
+            ranges = [(None, None)] + [(0, 0)] * (of - 1)
+        else:
+            ranges = [key_range(extent[0], extent[1], partition, of)
+                      for partition in range(of)]
+            # open ended, so keys outside the bounds still get synced
+            ranges[0] = (None, ranges[0][1])
+            ranges[-1] = (ranges[-1][0], None)
+    # All or nothing, so a worker creating the leases at the same time
+    # can't mix its bounds with ours.
+    try:
+        with transaction.atomic():
+            PartitionLease.objects.bulk_create([
+                PartitionLease(syncable=name, partition=partition, of=of,
+                               range_start=start, range_end=end)
+                for partition, (start, end) in enumerate(ranges)])
+    except IntegrityError:
+        pass
@@ -0,0 +1,174 @@
+"""
+Pipelined sync. Reading the source, syncing items and committing the target
+run as three stages, each on its own thread (and so its own database
+connection), connected by bounded queues. While one chunk is being committed
+the next one is already being read and synced; when a stage falls behind,
+the queue in front of it fills up and the stages before it wait, so at most
+`queue_size` chunks sit in each queue.
+
+Chunks go through every stage in order, so the target sees the same writes,
+in the same order, as a sequential sync. Neither side is loaded whole: model
+sources are read a page per chunk, and each chunk's target items are looked
+up just for that chunk (see `Collection.iter_chunks` and `for_keys`). Items
+created for a chunk are handed on to later chunks until they're committed,
+so a key appearing in several chunks is created once, as it would be
+sequentially.
+"""
+import queue
+import threading
+import time
+
+from django.db import connections
+
+
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """
+    Raised inside a stage when another stage has failed.
+    """
+    pass
+
+
+def run_pipeline(syncable, source, mapper, sizer, *args, **kwargs):
+    """
+    Sync `source` into `syncable.target`, or the `target` it was narrowed
+    to, committing as it goes. Called by `BaseSyncable.sync(pipeline=True)`.
+    `mapper`, if given, maps each chunk (see `syncable.parallel`). `sizer`
+    picks the chunk sizes and is told how long each chunk took to sync and
+    commit, not counting time spent waiting on the other stages, and, under
+    a budget, how many queries the three stages ran for it.
+    """
+    # the target to sync into, e.g. narrowed to a partition
+    base_target = kwargs.pop('target', None)
+    if base_target is None:
+        base_target = syncable.target
+    queue_size = kwargs.get('queue_size') or DEFAULT_QUEUE_SIZE
+    lookup_key = syncable.get_target_lookup_key()
+    read_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    failed = threading.Event()
+    errors = []
+    # target items created by the sync stage and not committed yet, by key
+    created = {}
+    created_lock = threading.Lock()
+
+    def read():
+        chunks = source.iter_chunks(sizer)
+        while True:
+            since = syncable._count_queries()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            _put(read_queue, (chunk, syncable._count_queries(since)), failed)
+        _put(read_queue, _DONE, failed)
+
+    def sync():
+        for chunk, queries in _drain(read_queue, failed):
+            syncable._check_deadline()
+            start = time.time()
+            since = syncable._count_queries()
+            keys = [syncable.get_unique_lookup_value(source_item)
+                    for source_item in chunk]
+            # Look at the uncommitted creates before the database, so an
+            # item committed in between is found in one or the other.
+            with created_lock:
+                pending = dict((key, created[key]) for key in keys
+                               if key in created)
+            target = base_target.for_keys(lookup_key, keys)
+            loaded = 0
+            if target is not base_target:
+                carried = [item for key, item in pending.items()
+                           if not target.find(lookup_key, key)]
+                target.add_items(carried)
+                loaded = len(target)
+            updated = syncable._sync_chunk(
+                chunk, lookup_key, mapper, *args, target=target, **kwargs)
+            if target is not base_target:
+                with created_lock:
+                    for item in target.all()[loaded:]:
+                        created[item.get(lookup_key)] = item
+            syncable.result['items'] += len(chunk)
+            queries = _add(queries, syncable._count_queries(since))
+            _put(write_queue, (updated, chunk, time.time() - start, queries),
+                 failed)
+        _put(write_queue, _DONE, failed)
+
+    def write():
+        for updated, chunk, seconds, queries in _drain(write_queue, failed):
+            start = time.time()
+            since = syncable._count_queries()
+            base_target.commit_items(updated)
+            with created_lock:
+                for item in updated:
+                    key = item.get(lookup_key)
+                    if created.get(key) is item:
+                        del created[key]
+            sizer.record(len(chunk), seconds + time.time() - start, chunk[0],
+                         _add(queries, syncable._count_queries(since)))
+
+    threads = [
+        threading.Thread(target=_stage,
+                         args=(func, failed, errors, syncable._query_counter),
+                         name='syncable-%s' % func.__name__)
+        for func in (read, sync, write)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def _stage(func, failed, errors, counter):
+    try:
+        if counter is not None:
+            # count this thread's connection's queries too
+            with counter:
+                func()
+        else:
+            func()
+    except _Aborted:
+        pass
+    except Exception as e:
+        errors.append(e)
+        failed.set()
+    finally:
+        # Connections are per thread; don't leave this stage's open.
+        connections.close_all()
+
+
+def _add(queries, more):
+    # query counts are None when not counting
+    if queries is None or more is None:
+        return None
+    return queries + more
+
+
+def _put(q, item, failed):
+    while True:
+        if failed.is_set():
+            raise _Aborted
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _drain(q, failed):
+    while True:
+        if failed.is_set():
+            raise _Aborted
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
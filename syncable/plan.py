@@ -0,0 +1,97 @@
+"""
+Plan mode: work out what a sync would do without doing it.
+
+`sync(plan=True)` walks the source in chunks like a chunked sync, with the
+same bulk `prefetch` of whatever `should_sync` needs (Records, for a
+Syncable) and the same indexed target lookups, but looks target items up
+with `Collection.find` so missing ones aren't created, and never updates,
+commits or sends signals. `should_sync` is called as usual, so it must not
+write anything itself; the default one doesn't.
+"""
+import time
+
+from .exceptions import LookupDoesNotExist, MultipleItemsReturned
+
+
+class SyncPlan(object):
+    """
+    What a sync would do. `creates` and `updates` hold
+    (unique lookup value, [changed fields]) pairs, `skips` the unique lookup
+    values of items that wouldn't be synced.
+    """
+    def __init__(self):
+        self.creates = []
+        self.updates = []
+        self.skips = []
+        self.seconds = None
+
+    @property
+    def changes(self):
+        """
+        Number of target items the sync would write.
+        """
+        return len(self.creates) + len(self.updates)
+
+    def __repr__(self):
+        return '<SyncPlan: %s creates, %s updates, %s skips>' % (
+            len(self.creates), len(self.updates), len(self.skips))
+
+
+_missing = object()
+
+
+def build_plan(syncable, source, sizer, target=None):
+    from .chunking import iter_sized_chunks
+
+    start = time.time()
+    plan = SyncPlan()
+    if target is None:
+        target = syncable.target
+    lookup_key = syncable.get_target_lookup_key()
+    for chunk in iter_sized_chunks(source.all(), sizer):
+        syncable._check_deadline()
+        chunk_start = time.time()
+        queries = syncable._count_queries()
+        syncable.prefetch(chunk)
+        for source_item in chunk:
+            unique_identifier = syncable.get_unique_lookup_value(source_item)
+            found = target.find(lookup_key, unique_identifier)
+            if len(found) > 1:
+                raise MultipleItemsReturned(
+                    'find() on %s collection returned %s Items when filtering'
+                    ' %s for %s' % (target.name, len(found), lookup_key,
+                                    unique_identifier))
+            target_item = found[0] if found else None
+            if target_item is None and not target.create_new:
+                plan.skips.append(unique_identifier)
+                continue
+
+            if not (syncable._force or
+                    syncable.should_sync(source_item, target_item)):
+                plan.skips.append(unique_identifier)
+                continue
+
+            mapped = syncable.get_mapped(source_item)
+            if target_item is None:
+                plan.creates.append((unique_identifier, sorted(mapped)))
+            else:
+                plan.updates.append(
+                    (unique_identifier, changed_fields(target_item, mapped)))
+        syncable.result['items'] += len(chunk)
+        sizer.record(len(chunk), time.time() - chunk_start, chunk[0],
+                     syncable._count_queries(queries))
+
+    plan.seconds = time.time() - start
+    return plan
+
+
+def changed_fields(target_item, mapped):
+    changed = []
+    for key, value in sorted(mapped.items()):
+        try:
+            current = target_item.get(key)
+        except LookupDoesNotExist:
+            current = _missing
+        if current != value:
+            changed.append(key)
+    return changed
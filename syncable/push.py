@@ -0,0 +1,205 @@
+"""
+Push mode: sync source model changes shortly after they happen instead of
+rescanning whole queues.
+
+A syncable with `push = True` and a `ModelCollection` source is hooked up to
+its source model's `post_save` and `post_delete` when it's registered. Each
+change queues the instance's unique lookup value once its transaction
+commits, so a flush never syncs a row before the change is visible, and
+rolled back changes aren't queued at all. Keys are coalesced, so a row saved
+a hundred times between flushes is synced once. `flush` (or a `Flusher`
+thread calling it every few seconds) runs the normal sync for just the
+queued keys.
+
+>>> class ContactSyncable(Syncable):
+...     source = ModelCollection(SalesForceContact)
+...     push = True
+...     push_queue = DatabaseQueue()  # default: an in-process queue
+>>> syncables.register(ContactSyncable)
+>>> Flusher(syncables, interval=5).start()
+
+Deleted rows are queued too, but since they're gone from the source the
+default sync has nothing to do for them.
+
+Flushes don't go through `syncable.budgets`: the syncable's query and time
+budgets aren't counted or enforced for pushed keys.
+"""
+from collections import OrderedDict
+import json
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .base import ModelCollection, ModelItem
+from .models import QueuedKey
+
+
+class InProcessQueue(object):
+    """
+    Coalescing queue living in this process. Fast, but keys queued by other
+    processes (e.g. other web workers) are only seen by their own flushers.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()
+
+    def put(self, name, key):
+        with self._lock:
+            self._keys.setdefault(name, OrderedDict())[key] = None
+
+    def pop_all(self):
+        """
+        Remove and return everything queued, as {syncable name: [keys]}.
+        """
+        with self._lock:
+            keys, self._keys = self._keys, OrderedDict()
+        return OrderedDict((name, list(queued))
+                           for name, queued in keys.items())
+
+    def __len__(self):
+        return sum(len(queued) for queued in self._keys.values())
+
+
+class DatabaseQueue(object):
+    """
+    Coalescing queue stored in the `QueuedKey` table, so any process can
+    queue keys and any process can flush them. Keys must be JSON
+    serializable.
+    """
+    def put(self, name, key):
+        QueuedKey.objects.get_or_create(syncable=name, key=json.dumps(key))
+
+    def pop_all(self):
+        queued = list(QueuedKey.objects.order_by('pk'))
+        QueuedKey.objects.filter(pk__in=[row.pk for row in queued]).delete()
+        keys = OrderedDict()
+        for row in queued:
+            keys.setdefault(row.syncable, []).append(json.loads(row.key))
+        return keys
+
+    def __len__(self):
+        return QueuedKey.objects.count()
+
+
+default_queue = InProcessQueue()
+
+
+def get_queue(syncable_class):
+    if syncable_class.push_queue is None:
+        return default_queue
+    return syncable_class.push_queue
+
+
+def connect(syncable_class):
+    """
+    Queue keys of `syncable_class` whenever its source model changes.
+    """
+    syncable = syncable_class()
+    source = syncable.get_source()
+    if not isinstance(source, ModelCollection):
+        raise ImproperlyConfigured(
+            '%s: push syncables need a ModelCollection source'
+            % syncable_class.__name__)
+
+    name = syncable.get_name()
+    queue = get_queue(syncable_class)
+
+    def enqueue(sender, instance, using=None, **kwargs):
+        key = syncable.get_unique_lookup_value(ModelItem(instance))
+        transaction.on_commit(lambda: queue.put(name, key), using=using)
+
+    for signal in (post_save, post_delete):
+        signal.connect(enqueue, sender=source.get_model(), weak=False,
+                       dispatch_uid=_dispatch_uid(name))
+
+
+def disconnect(syncable_class):
+    syncable = syncable_class()
+    for signal in (post_save, post_delete):
+        signal.disconnect(sender=syncable.get_source().get_model(),
+                          dispatch_uid=_dispatch_uid(syncable.get_name()))
+
+
+def flush(registry):
+    """
+    Sync the queued keys of every push syncable in `registry`. Returns the
+    number of keys flushed.
+
+    If a syncable's sync fails its keys are queued again for the next flush
+    and the other syncables are still flushed; the first error is raised
+    afterwards.
+    """
+    flushed = 0
+    errors = []
+    push_syncables = registry.get_push_syncables()
+    queues = []
+    for syncable_class in push_syncables:
+        queue = get_queue(syncable_class)
+        if queue not in queues:
+            queues.append(queue)
+
+    by_name = dict((syncable_class().get_name(), syncable_class)
+                   for syncable_class in push_syncables)
+    for queue in queues:
+        for name, keys in queue.pop_all().items():
+            if name not in by_name:
+                # Someone else's; leave it for their flush.
+                for key in keys:
+                    queue.put(name, key)
+                continue
+            try:
+                sync_keys(by_name[name], keys)
+            except Exception as e:
+                for key in keys:
+                    queue.put(name, key)
+                errors.append(e)
+                continue
+            flushed += len(keys)
+    if errors:
+        raise errors[0]
+    return flushed
+
+
+def sync_keys(syncable_class, keys):
+    """
+    Sync and commit just `keys`. The target is narrowed to the same keys
+    when it's a ModelCollection so only those rows are loaded and saved.
+    """
+    syncable = syncable_class()
+    if isinstance(syncable.target, ModelCollection):
+        syncable.target = syncable.target.filter_keys(
+            syncable.get_target_lookup_key(), keys)
+    target = syncable.sync(keys=keys)
+    if not syncable._committed:
+        target.commit()
+    return target
+
+
+class Flusher(threading.Thread):
+    """
+    Background thread flushing `registry` every `interval` seconds.
+    """
+    def __init__(self, registry, interval=5):
+        super(Flusher, self).__init__(name='syncable-flusher')
+        self.daemon = True
+        self.registry = registry
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                flush(self.registry)
+            except Exception as e:
+                print('Error during push flush, skipping.', e)
+            finally:
+                connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _dispatch_uid(name):
+    return 'syncable.push:%s' % name
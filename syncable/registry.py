@@ -1,5 +1,9 @@
+from collections import OrderedDict
+
 from .exceptions import NotRegistered, AlreadyRegistered
 from .base import Syncable
+from .budgets import run_syncable
+from .cache import SourceCache
 
 
 class SyncableRegistry(object):
@@ -18,18 +22,49 @@ class SyncableRegistry(object):
     >>> syncables.run(queues=['queue-name'])
 
     """
+    # max items kept in the per run source cache
+    source_cache_size = 100000
+
     def __init__(self, *args, **kwargs):
         self._registry = {}
 
-    def run(self, queues=['default'], force=False):
+    def run(self, queues=['default'], force=False, cache=True, **options):
+        """
+        Sync and commit every syncable in `queues`. Extra options are passed
+        through to `sync`, e.g. `pipeline=True`.
+
+        Syncables reading the same source share one loaded copy of it for
+        the run (see `syncable.cache`). Pass `cache=False` to load sources
+        separately, or your own `SourceCache`.
+
+        Each sync runs under the syncable's query and time budget, see
+        `syncable.budgets`.
+
+        Returns the `result` of each syncable, by `get_name()`, or with
+        `plan=True` its `SyncPlan`.
+        """
+        if cache is True:
+            cache = SourceCache(max_items=self.source_cache_size)
+        elif cache is False:
+            cache = None
+
+        results = OrderedDict()
+
         for queue in queues:
             for updatable in self._get_queue(queue):
                 u = updatable()
-                target = u.sync(force=force)
-                target.commit()
-
-    def run_all(self, force=False):
-        self.run(self._registry.keys(), force=force)
+                target = run_syncable(u, force=force, cache=cache, **options)
+                if options.get('plan', False):
+                    results[u.get_name()] = target
+                    continue
+                if cache is not None:
+                    # A later syncable may read this target as its source.
+                    cache.invalidate(target)
+                results[u.get_name()] = u.result
+        return results
+
+    def run_all(self, force=False, cache=True, **options):
+        return self.run(self._registry.keys(), force=force, cache=cache, **options)
 
     def register(self, syncable_or_iterable, queues=['default']):
         if not isinstance(syncable_or_iterable, list):
@@ -50,6 +85,11 @@ class SyncableRegistry(object):
 
                 self._get_queue(queue).append(syncable)
 
+        for syncable in syncable_or_iterable:
+            if syncable.push:
+                from .push import connect
+                connect(syncable)
+
     def unregister(self, syncable_or_iterable, queues=None):
         if not isinstance(syncable_or_iterable, list):
             syncable_or_iterable = [syncable_or_iterable]
@@ -65,6 +105,28 @@ class SyncableRegistry(object):
                         (syncable.__name__, queue))
                 self._get_queue(queue).remove(syncable)
 
+            if syncable.push and syncable not in self.get_push_syncables():
+                from .push import disconnect
+                disconnect(syncable)
+
+    def get_push_syncables(self):
+        """
+        Registered syncables with `push = True`, each listed once.
+        """
+        push_syncables = []
+        for queue in self._registry.values():
+            for syncable in queue:
+                if syncable.push and syncable not in push_syncables:
+                    push_syncables.append(syncable)
+        return push_syncables
+
+    def flush(self):
+        """
+        Sync the keys queued by push syncables, see `syncable.push`.
+        """
+        from .push import flush
+        return flush(self)
+
     def get(self, queue):
         return self._get_queue(queue)
 
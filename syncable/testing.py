@@ -0,0 +1,48 @@
+"""
+Test helpers.
+
+`assert_constant_queries` catches bulk sync paths quietly turning back into
+per item loops:
+
+>>> def make_syncable(rows):
+...     # populate `rows` source rows and return a syncable for them
+...     return ContactSyncable()
+>>> def test_contact_sync_queries(db):
+...     assert_constant_queries(make_syncable, sizes=(10, 100))
+"""
+from .budgets import run_syncable
+
+
+def query_profile(make_syncable, sizes=(10, 100), **options):
+    """
+    Run `make_syncable(rows)` for each size in `sizes` through the budgeted
+    runner and return {rows: queries}.
+    """
+    profile = {}
+    for rows in sizes:
+        syncable = make_syncable(rows)
+        run_syncable(syncable, **options)
+        profile[rows] = syncable.result['queries']
+    return profile
+
+
+def assert_constant_queries(make_syncable, sizes=(10, 100), per_item=False,
+                            tolerance=0, **options):
+    """
+    Assert a sync runs the same number of queries whatever the row count,
+    give or take `tolerance`. With `per_item`, assert the same number of
+    queries per row instead, i.e. that they grow no faster than the rows.
+    Returns the profile.
+    """
+    profile = query_profile(make_syncable, sizes, **options)
+    if per_item:
+        costs = dict((rows, float(queries) / rows)
+                     for rows, queries in profile.items())
+    else:
+        costs = profile
+    if max(costs.values()) - min(costs.values()) > tolerance:
+        raise AssertionError(
+            'query count changes with the number of rows (rows: queries) %s'
+            % ', '.join('%s: %s' % (rows, profile[rows])
+                        for rows in sorted(profile)))
+    return profile
@@ -1,3 +1,6 @@
+import threading
+import zlib
+
 from .exceptions import LookupDoesNotExist
 
 
@@ -40,34 +43,102 @@ def resolve_lookup(value, context):
     return current
 
 
-def autodiscover():
+def partition_index(value, count):
+    """
+    Stable hash partition of `value`. Integers map to `abs(value) % count`,
+    the same as `Abs(Mod(...))` in the database; anything else is hashed with
+    crc32 since `hash()` of strings differs between processes.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return abs(value) % count
+    return zlib.crc32(str(value).encode('utf-8')) % count
+
+
+def key_range(lowest, highest, index, count):
+    """
+    Split the integer keys `lowest`..`highest` into `count` contiguous
+    ranges and return the `index`th as (start, end), end exclusive.
+    """
+    span = highest - lowest + 1
+    return (lowest + span * index // count,
+            lowest + span * (index + 1) // count)
+
+
+class QueryCounter(object):
+    """
+    Counts the queries run on a database connection while active, without
+    keeping the queries themselves around.
+
+    >>> with QueryCounter() as queries:
+    ...     syncable.sync()
+    >>> queries.count
+
+    Connections are per thread, so it only sees the queries of threads that
+    entered it. Other threads can enter the same counter to add theirs;
+    `thread_count` is the current thread's share.
     """
-    Auto-discover INSTALLED_APPS admin.py modules and fail silently when
-    not present. This forces an import on them to register any admin bits they
-    may want.
+    def __init__(self, using=None):
+        from django.db import DEFAULT_DB_ALIAS
+        self.using = using or DEFAULT_DB_ALIAS
+        self.count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        self._local.count = self.thread_count() + 1
+        return execute(sql, params, many, context)
+
+    def thread_count(self):
+        return getattr(self._local, 'count', 0)
+
+    def __enter__(self):
+        from django.db import connections
+        wrapper = connections[self.using].execute_wrapper(self)
+        wrapper.__enter__()
+        self._wrappers().append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrappers().pop().__exit__(*exc_info)
+
+    def _wrappers(self):
+        if not hasattr(self._local, 'wrappers'):
+            self._local.wrappers = []
+        return self._local.wrappers
+
+
+def autodiscover():
     """
+    Auto-discover INSTALLED_APPS syncables.py modules and fail silently when
+    not present. This forces an import on them to register any syncables
+    they may want.
 
-    import copy
-    from django.conf import settings
+    Apps without a syncables module are skipped without attempting an
+    import, and the registry is only snapshotted for apps that have one.
+    Importing a syncables module is cheap since collections don't load
+    anything until they're synced.
+    """
     from importlib import import_module
+    from django.apps import apps
     from django.utils.module_loading import module_has_submodule
     from .registry import syncables
 
-    for app in settings.INSTALLED_APPS:
-        mod = import_module(app)
-        # Attempt to import the app's admin module.
+    for app_config in apps.get_app_configs():
+        if not module_has_submodule(app_config.module, 'syncables'):
+            continue
+
+        # Copy the queues too; a shallow copy would share the lists the
+        # failed import appended to.
+        before_import_registry = dict(
+            (queue, list(registered))
+            for queue, registered in syncables._registry.items())
         try:
-            before_import_registry = copy.copy(syncables._registry)
-            import_module('%s.syncables' % app)
-        except:
-            # Reset the model registry to the state before the last import as
+            import_module('%s.syncables' % app_config.name)
+        except Exception:
+            # Reset the registry to the state before the last import as
             # this import will have to reoccur on the next request and this
-            # could raise NotRegistered and AlreadyRegistered exceptions
-            # (see #8245).
+            # could raise NotRegistered and AlreadyRegistered exceptions.
             syncables._registry = before_import_registry
-
-            # Decide whether to bubble up this error. If the app just
-            # doesn't have an admin module, we can ignore the error
-            # attempting to import it, otherwise we want it to bubble up.
-            if module_has_submodule(mod, 'syncables'):
-                raise
+            raise
@@ -1,6 +1,6 @@
 SECRET_KEY = 'SEKRIT'
 
-INSTALLED_APPS = ('syncable', 'tests',)
+INSTALLED_APPS = ('syncable', 'tests', 'benchmarks',)
 
 DATABASES = {
     'default': {
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from syncable.aio import AsyncCollection
+from syncable.base import Collection, DictItem, Syncable
+from syncable.cache import SourceCache
+
+
+PAGES = {
+    1: [{'user_id': 1, 'city': 'Washington', 'last_updated': 1},
+        {'user_id': 2, 'city': 'Baltimore', 'last_updated': 1}],
+    2: [{'user_id': 3, 'city': 'Boston', 'last_updated': 1}],
+    3: [{'user_id': 4, 'city': 'Denver', 'last_updated': 1}],
+}
+
+
+def make_fetcher(in_flight=None):
+    in_flight = in_flight if in_flight is not None else {'now': 0, 'max': 0}
+
+    async def fetch_page(page):
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        await asyncio.sleep(0.01)
+        in_flight['now'] -= 1
+        return [dict(row) for row in PAGES.get(page, [])]
+    return fetch_page
+
+
+def test_async_collection_fetches_until_empty_page():
+    in_flight = {'now': 0, 'max': 0}
+    collection = AsyncCollection(make_fetcher(in_flight), concurrency=2)
+    user_ids = sorted(item.get('user_id') for item in collection.all())
+    assert user_ids == [1, 2, 3, 4]
+    assert len(collection) == 4
+    assert 1 < in_flight['max'] <= 2
+
+
+def test_async_collection_explicit_pages():
+    collection = AsyncCollection(make_fetcher(), pages=[3, 9, 1])
+    assert sorted(item.get('user_id') for item in collection.all()) == \
+        [1, 2, 4]
+    assert collection.get('user_id', 4).get('city') == 'Denver'
+
+
+def test_async_collection_pages_generator():
+    collection = AsyncCollection(make_fetcher(),
+                                 pages=(page for page in [1, 3]))
+    SourceCache().get(collection)
+    assert sorted(item.get('user_id') for item in collection.all()) == \
+        [1, 2, 4]
+    collection.refresh()
+    assert len(collection) == 3
+
+
+def test_async_collection_raises_fetch_errors():
+    async def fetch_page(page):
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        list(AsyncCollection(fetch_page).all())
+
+
+def user_mapping(source):
+    return {'city': source.get('city'),
+            'last_updated': source.get('last_updated')}
+
+
+@pytest.mark.django_db
+def test_sync_from_async_collection():
+    class ApiSyncable(Syncable):
+        source = AsyncCollection(make_fetcher(), concurrency=3)
+        target = Collection([{'user_id': 1, 'city': 'New York'}],
+                            item_class=DictItem)
+        mapping = [user_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+
+    target = ApiSyncable().sync()
+    assert len(target) == 4
+    assert target.get('user_id', 1).get('city') == 'Washington'
+    assert target.get('user_id', 4).get('city') == 'Denver'
@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.suite import BENCHMARKS, changed_indexes, run_benchmark
+
+
+def test_changed_indexes():
+    assert changed_indexes(10, 0.3) == [0, 3, 6]
+    assert changed_indexes(10, 0) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', list(BENCHMARKS))
+def test_run_benchmark(name):
+    result = run_benchmark(name, 20, change_ratio=0.25)
+    assert result['items_per_sec'] > 0
+    assert result['peak_memory'] > 0
+    expected_synced = {'collection-get': 0, 'resolve-lookup': 0}
+    for kind in ('dict', 'model'):
+        expected_synced.update({
+            'sync-%s-full' % kind: 20,
+            # just the changed rows
+            'sync-%s-incremental' % kind: 5,
+            'sync-%s-forced' % kind: 20,
+        })
+    assert result['synced'] == expected_synced.get(name, 20)
@@ -0,0 +1,174 @@
+import time
+
+import pytest
+
+from syncable.base import BaseSyncable, Collection, DictItem, Syncable
+from syncable.budgets import run_syncable
+from syncable.exceptions import BudgetExceeded, BudgetWarning
+from syncable.models import Record
+from syncable.registry import SyncableRegistry
+from syncable.testing import assert_constant_queries
+from syncable.utils import QueryCounter
+
+
+def user_mapping(source):
+    return {'city': source.get('city'),
+            'last_updated': source.get('last_updated')}
+
+
+def make_rows(rows):
+    return [{'user_id': i, 'city': 'City %s' % i, 'last_updated': 1}
+            for i in range(rows)]
+
+
+class UserSyncable(Syncable):
+    mapping = [user_mapping, ]
+    unique_lookup_key = ('user_id', 'user_id')
+    watch_key = 'last_updated'
+    chunk_size = 100
+
+
+def make_syncable(rows=10, **attrs):
+    syncable = type('BudgetedSyncable', (UserSyncable, ), attrs)()
+    syncable.source = Collection(make_rows(rows), item_class=DictItem)
+    syncable.target = Collection([], item_class=DictItem)
+    return syncable
+
+
+class BulkCollection(Collection):
+    """
+    Commits each batch of items with one query.
+    """
+    item_class = DictItem
+
+    def commit_items(self, items):
+        Record.objects.bulk_create(
+            [Record(key='user:%s' % item.get('user_id')) for item in items])
+
+
+class PerItemCollection(BulkCollection):
+    def commit_items(self, items):
+        for item in items:
+            Record.objects.create(key='user:%s' % item.get('user_id'))
+
+
+def make_committing_syncable(target_class, rows):
+    class CommittingSyncable(BaseSyncable):
+        source = Collection(make_rows(rows), item_class=DictItem)
+        target = target_class([])
+        mapping = [user_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+
+        def should_sync(self, source, target):
+            return True
+    return CommittingSyncable()
+
+
+@pytest.mark.django_db
+def test_run_counts_queries_and_items():
+    syncable = make_syncable()
+    run_syncable(syncable)
+    # a lookup and an insert per new Record, both lookups when checking
+    # and updating it
+    assert syncable.result['items'] == 10
+    assert syncable.result['queries'] == 30
+    assert syncable.result['violations'] == []
+
+
+@pytest.mark.django_db
+def test_per_item_budget_warns():
+    syncable = make_syncable(max_queries_per_item=2)
+    with pytest.warns(BudgetWarning, match='3.00 queries per item'):
+        run_syncable(syncable)
+    # warnings still commit the sync
+    assert len(syncable.target) == 10
+
+
+@pytest.mark.django_db
+def test_per_item_budget_raises_after_commit():
+    syncable = make_syncable(max_queries_per_item=2, budget_action='raise')
+    with pytest.raises(BudgetExceeded):
+        run_syncable(syncable)
+    assert Record.objects.count() == 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_per_chunk_budget():
+    syncable = make_syncable(max_queries_per_chunk=5, budget_action='raise')
+    with pytest.raises(BudgetExceeded, match='11 queries in a chunk'):
+        run_syncable(syncable, pipeline=True)
+    assert syncable.result['chunks'][0]['queries'] == 11
+
+
+@pytest.mark.django_db
+def test_per_chunk_budget_unchunked():
+    syncable = make_syncable(max_queries_per_chunk=5)
+    with pytest.warns(BudgetWarning, match='queries in a chunk, budget 5'):
+        run_syncable(syncable)
+    assert Record.objects.count() == 10
+    assert syncable.result['violations'][0].startswith(
+        '%s queries' % syncable.result['queries'])
+
+
+@pytest.mark.django_db
+def test_time_budget():
+    syncable = make_syncable(max_seconds=0)
+    with pytest.warns(BudgetWarning, match='budget 0s'):
+        run_syncable(syncable)
+
+
+def slow_mapping(source):
+    time.sleep(0.01)
+    return user_mapping(source)
+
+
+@pytest.mark.django_db
+def test_time_budget_stops_sync():
+    syncable = make_syncable(max_seconds=0.03, budget_action='raise',
+                             mapping=[slow_mapping, ])
+    with pytest.raises(BudgetExceeded, match='longer than its 0.03s'):
+        run_syncable(syncable)
+    assert 0 < syncable.result['items'] < 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipelined_queries_are_counted():
+    pipelined = make_committing_syncable(BulkCollection, 30)
+    run_syncable(pipelined, pipeline=True, chunk_size=10)
+    assert Record.objects.count() == 30
+
+    # the writer thread's three commits count as if they had run here
+    with QueryCounter() as commit:
+        BulkCollection([]).commit_items([DictItem({'user_id': 'x'})])
+    assert pipelined.result['queries'] == 3 * commit.count > 0
+    assert [chunk['queries'] for chunk in pipelined.result['chunks']] == \
+        [commit.count] * 3
+
+
+@pytest.mark.django_db
+def test_registry_runs_under_budget():
+    registry = SyncableRegistry()
+
+    class SourcedSyncable(UserSyncable):
+        source = Collection(make_rows(5), item_class=DictItem)
+        target = Collection([], item_class=DictItem)
+        max_queries_per_item = 1
+        budget_action = 'raise'
+
+    registry.register(SourcedSyncable)
+    with pytest.raises(BudgetExceeded):
+        registry.run()
+
+
+@pytest.mark.django_db
+def test_assert_constant_queries():
+    profile = assert_constant_queries(
+        lambda rows: make_committing_syncable(BulkCollection, rows))
+    assert profile == {10: 1, 100: 1}
+
+    with pytest.raises(AssertionError, match='10: 10, 100: 100'):
+        assert_constant_queries(
+            lambda rows: make_committing_syncable(PerItemCollection, rows))
+    assert_constant_queries(
+        lambda rows: make_committing_syncable(PerItemCollection, rows),
+        per_item=True)
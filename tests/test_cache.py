@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from syncable.aio import AsyncCollection
+from syncable.base import Collection, DictItem, ModelCollection, \
+    ModelSource, ModelTarget, Syncable
+from syncable.cache import SourceCache
+from syncable.models import QueuedKey, Record
+from syncable.registry import SyncableRegistry
+
+
+def make_collection(rows):
+    return Collection([{'user_id': i} for i in range(rows)],
+                      item_class=DictItem)
+
+
+def test_collection_get_uses_index():
+    collection = make_collection(5)
+    assert collection.get('user_id', 3).get('user_id') == 3
+    assert 'user_id' in collection._indexes
+    created = collection.get('user_id', 9)
+    assert collection.get('user_id', 9) is created
+    assert len(collection) == 6
+
+
+def test_collection_find_unhashable_values():
+    collection = Collection([{'tags': ['a']}, {'tags': ['b']}],
+                            item_class=DictItem)
+    assert collection.find('tags', ['b'])[0].get('tags') == ['b']
+    assert collection._indexes['tags'] is None
+
+
+@pytest.mark.django_db
+def test_source_cache_shares_snapshots(django_assert_num_queries):
+    Record.objects.create(key='a')
+    cache = SourceCache()
+    first = ModelCollection(Record.objects.all())
+    second = ModelCollection(Record.objects.all())
+    filtered = ModelCollection(Record.objects.filter(key='b'))
+    other = ModelCollection(QueuedKey)
+    with django_assert_num_queries(0):
+        assert cache.get(first) is first
+        assert cache.get(second) is first
+        assert cache.get(filtered) is filtered
+        assert cache.get(other) is other
+    assert (cache.hits, cache.misses) == (1, 3)
+    with django_assert_num_queries(1):
+        len(cache.get(second))
+        len(cache.get(second))
+
+    # any snapshot of the written model is stale
+    cache.invalidate(ModelCollection(Record.objects.filter(key='a')))
+    assert first not in cache
+    assert filtered not in cache
+    assert other in cache
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_source_cache_evicts_least_recently_used():
+    cache = SourceCache(max_items=5)
+    small, medium, large = make_collection(2), make_collection(3), \
+        make_collection(6)
+    for collection in (small, medium, small, make_collection(1)):
+        len(cache.get(collection))
+    assert cache.get(large) is large
+    assert small in cache
+    assert medium not in cache
+    # too big on its own, so it goes once it's loaded
+    len(large)
+    cache.get(make_collection(1))
+    assert large not in cache
+
+
+def test_source_cache_does_not_load_sources():
+    fetched = []
+
+    async def fetch_page(page):
+        await asyncio.sleep(0)
+        fetched.append(page)
+        return [{'id': page}] if page < 3 else []
+
+    collection = AsyncCollection(fetch_page)
+    cache = SourceCache(max_items=10)
+    assert cache.get(collection) is collection
+    assert fetched == []
+    assert [item.get('id') for item in collection.all()] == [1, 2]
+    assert cache.get(collection) is collection
+    assert len(cache) == 2
+
+
+def city_mapping(source):
+    return {'value': source.get('value')}
+
+
+@pytest.mark.django_db
+def test_registry_run_loads_shared_source_once(django_assert_num_queries):
+    Record.objects.create(key='a', value='1')
+    Record.objects.create(key='b', value='2')
+
+    def make_syncable():
+        class RecordSyncable(Syncable):
+            source = ModelCollection(Record)
+            target = Collection([], item_class=DictItem)
+            mapping = [city_mapping, ]
+            unique_lookup_key = ('key', 'key')
+
+            def should_sync(self, source_item, target_item):
+                return True
+
+            def post_item_sync(self, source_item, target_item):
+                pass
+        return RecordSyncable
+
+    registry = SyncableRegistry()
+    first, second = make_syncable(), make_syncable()
+    registry.register([first, second], queues=['cache'])
+    with django_assert_num_queries(1):
+        registry.run(['cache'])
+    assert len(second.target) == 2
+    with django_assert_num_queries(2):
+        registry.run(['cache'], cache=False)
+
+
+@pytest.mark.django_db
+def test_registry_run_invalidates_written_model():
+    Record.objects.create(key='a', value='old')
+
+    class ReaderSyncable(Syncable):
+        source = ModelSource(Record)
+        target = Collection([], item_class=DictItem)
+        mapping = [city_mapping, ]
+        unique_lookup_key = ('key', 'key')
+
+        def should_sync(self, source_item, target_item):
+            return True
+
+        def post_item_sync(self, source_item, target_item):
+            pass
+
+    class WriterSyncable(ReaderSyncable):
+        source = Collection([{'key': 'a', 'value': 'written'}],
+                            item_class=DictItem)
+        target = ModelTarget(Record)
+
+    class LaterReaderSyncable(ReaderSyncable):
+        target = Collection([], item_class=DictItem)
+
+    registry = SyncableRegistry()
+    registry.register([ReaderSyncable, WriterSyncable, LaterReaderSyncable],
+                      queues=['cache'])
+    registry.run(['cache'])
+    assert [item.get('value') for item in LaterReaderSyncable.target.all()] \
+        == ['written']
@@ -0,0 +1,71 @@
+from syncable.base import BaseSyncable, Collection, DictItem
+from syncable.chunking import AdaptiveChunkSizer, FixedChunkSizer, \
+    item_size, iter_sized_chunks
+
+
+def test_iter_sized_chunks_follows_sizer():
+    sizer = FixedChunkSizer(4)
+    assert [len(chunk) for chunk in iter_sized_chunks(range(10), sizer)] == \
+        [4, 4, 2]
+
+
+def test_adaptive_sizer_moves_toward_target_latency():
+    sizer = AdaptiveChunkSizer(target_seconds=1.0, initial=100)
+    sizer.record(100, 0.1)
+    assert sizer.next_size() == 200  # growth is capped at 2x
+    sizer.record(200, 0.5)
+    assert sizer.next_size() == 400
+    sizer.record(400, 1.6)
+    assert sizer.next_size() == 250
+    sizer.record(250, 10)
+    assert sizer.next_size() == 125  # shrinking is capped at 1/2
+    assert [entry['size'] for entry in sizer.history] == [100, 200, 400, 250]
+
+
+def test_adaptive_sizer_respects_bounds_and_memory():
+    sizer = AdaptiveChunkSizer(initial=100, max_size=150)
+    sizer.record(100, 0)
+    assert sizer.next_size() == 150
+
+    item = DictItem({'name': 'x' * 1000})
+    sizer = AdaptiveChunkSizer(initial=100, max_memory=item_size(item) * 30)
+    sizer.record(100, 0.01, item)
+    assert sizer.next_size() == 30
+
+
+def city_mapping(source):
+    return {'city': source.get('city')}
+
+
+class CitySyncable(BaseSyncable):
+    source = Collection([{'user_id': i, 'city': 'City %s' % i}
+                         for i in range(1000)], item_class=DictItem)
+    mapping = [city_mapping, ]
+    unique_lookup_key = ('user_id', 'user_id')
+    chunk_seconds = 10
+
+    def should_sync(self, source, target):
+        return True
+
+
+def test_pipelined_sync_reports_adaptive_chunks():
+    syncable = CitySyncable()
+    syncable.target = Collection([], item_class=DictItem)
+    syncable.sync(pipeline=True)
+    chunks = syncable.result['chunks']
+    sizes = [chunk['size'] for chunk in chunks]
+    # the reader runs ahead of the feedback, so only the trend is fixed
+    assert sizes[0] == 100
+    assert max(sizes) > 100
+    assert sum(sizes) == 1000
+    assert all(chunk['seconds'] >= 0 for chunk in chunks)
+    assert syncable.result['updated'] == 1000
+
+
+def test_fixed_chunk_size_attribute():
+    syncable = CitySyncable()
+    syncable.target = Collection([], item_class=DictItem)
+    syncable.chunk_size = 400
+    syncable.sync(pipeline=True)
+    assert [chunk['size'] for chunk in syncable.result['chunks']] == \
+        [400, 400, 200]
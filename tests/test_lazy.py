@@ -0,0 +1,93 @@
+import pytest
+
+from syncable.base import BaseSyncable, Collection, DictItem, ModelCollection
+from syncable.models import QueuedKey, Record
+from syncable.utils import autodiscover
+
+
+def value_mapping(source):
+    return {'value': source.get('value')}
+
+
+class RecordSyncable(BaseSyncable):
+    source = ModelCollection(Record)
+    target = Collection([], item_class=DictItem)
+    mapping = [value_mapping, ]
+    unique_lookup_key = ('key', 'key')
+
+    def should_sync(self, source_item, target_item):
+        return True
+
+
+@pytest.mark.django_db
+def test_model_collection_is_lazy(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        collection = ModelCollection(Record.objects.filter(key='a'))
+        assert collection.get_model() is Record
+    Record.objects.create(key='a')
+    with django_assert_num_queries(1):
+        assert len(collection) == 1
+        assert len(collection) == 1
+
+
+@pytest.mark.django_db
+def test_each_syncable_gets_a_fresh_collection():
+    Record.objects.create(key='a', value='1')
+    first = RecordSyncable()
+    second = RecordSyncable()
+    assert first.source is first.source
+    assert first.source is not second.source
+    assert RecordSyncable.source._data is None
+    # in-memory collections are their own data, so they're shared
+    assert first.target is RecordSyncable.target
+
+
+def test_shared_collection_gets_a_copy_per_attribute():
+    records = ModelCollection(Record)
+
+    class WriterSyncable(RecordSyncable):
+        source = ModelCollection(QueuedKey)
+        target = records
+
+    class ReaderSyncable(RecordSyncable):
+        source = records
+
+    writer = WriterSyncable()
+    assert writer.target is writer.target
+    assert writer.target.get_model() is Record
+    assert writer.source.get_model() is QueuedKey
+    assert ReaderSyncable().source is not writer.target
+
+
+class ScopedCollection(ModelCollection):
+    def __init__(self, data, scope, *args, **kwargs):
+        super(ScopedCollection, self).__init__(data, *args, **kwargs)
+        self.scope = scope
+
+
+def test_fresh_copy_keeps_subclass_state():
+    collection = ScopedCollection(Record, 'tenant', create_new=False)
+    copy = collection.fresh()
+    assert copy is not collection
+    assert (copy.scope, copy.create_new) == ('tenant', False)
+    assert copy.filter_keys('key', ['a']).scope == 'tenant'
+
+
+@pytest.mark.django_db
+def test_sync_reloads_source():
+    syncable = RecordSyncable()
+    syncable.target = Collection([], item_class=DictItem)
+    Record.objects.create(key='a', value='1')
+    syncable.sync()
+    Record.objects.filter(key='a').update(value='2')
+    Record.objects.create(key='b', value='1')
+    syncable.sync()
+    assert [item.data for item in syncable.target.all()] == \
+        [{'key': 'a', 'value': '2'}, {'key': 'b', 'value': '1'}]
+
+
+def test_autodiscover_skips_apps_without_syncables(monkeypatch):
+    imported = []
+    monkeypatch.setattr('importlib.import_module', imported.append)
+    autodiscover()
+    assert imported == []
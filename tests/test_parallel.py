@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from syncable.base import BaseSyncable, Collection, DictItem, ModelItem
+from syncable.models import Record
+from syncable.parallel import ProcessMapper, get_context
+
+
+def slow_city_mapping(source):
+    city = source.get('city')
+    return {'city': city.upper(), 'pid': os.getpid()}
+
+
+def make_syncable(rows=100):
+    class CitySyncable(BaseSyncable):
+        source = Collection(
+            [{'user_id': i, 'city': 'City %s' % i} for i in range(rows)],
+            item_class=DictItem)
+        target = Collection([], item_class=DictItem)
+        mapping = [slow_city_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+
+        def should_sync(self, source, target):
+            return True
+    return CitySyncable()
+
+
+def test_process_mapper_keeps_order():
+    mapper = ProcessMapper([slow_city_mapping, ], 3)
+    items = [DictItem({'city': 'c%s' % i}) for i in range(10)]
+    try:
+        mapped = mapper.map(items)
+    finally:
+        mapper.close()
+    assert [m['city'] for m in mapped] == ['C%s' % i for i in range(10)]
+    assert all(m['pid'] != os.getpid() for m in mapped)
+
+
+def test_workers_are_not_forked_from_the_syncing_process():
+    # the syncing process may have pipeline threads running
+    assert get_context().get_start_method() == 'forkserver'
+
+
+def test_sync_with_processes_matches_sequential_sync():
+    sequential = make_syncable()
+    parallel = make_syncable()
+    sequential.sync()
+    parallel.sync(processes=2, chunk_size=30)
+
+    def cities(syncable):
+        return [(item.get('user_id'), item.get('city'))
+                for item in syncable.target.all()]
+    assert cities(parallel) == cities(sequential)
+    assert len(parallel._updated) == 100
+
+
+def test_sync_with_processes_in_pipeline():
+    syncable = make_syncable()
+    syncable.sync(processes=2, pipeline=True, chunk_size=25)
+    assert [item.get('city') for item in syncable.target.all()] == \
+        ['CITY %s' % i for i in range(100)]
+
+
+@pytest.mark.django_db
+def test_model_item_raw_data():
+    record = Record.objects.create(key='a', value='b')
+    raw = ModelItem(record).to_raw()
+    assert raw == {'id': record.pk, 'pk': record.pk, 'key': 'a', 'value': 'b'}
+    assert ModelItem.from_raw(raw).get('key') == 'a'
@@ -0,0 +1,231 @@
+import datetime
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from syncable.base import BaseSyncable, Collection, DictItem, ModelCollection
+from syncable.exceptions import PartitionLeaseLost
+from syncable.models import PartitionLease, Record
+from syncable.partitions import claim_partition, complete_partition, \
+    renew_partition, reset_partitions
+from syncable.utils import partition_index
+
+
+def make_collection(rows=20):
+    return Collection([{'user_id': i, 'city': 'City %s' % i}
+                       for i in range(rows)], item_class=DictItem)
+
+
+def user_ids(collection, key='user_id'):
+    return [item.get(key) for item in collection.all()]
+
+
+@pytest.mark.parametrize('strategy', ['hash', 'range'])
+def test_collection_partitions_cover_source_once(strategy):
+    collection = make_collection()
+    partitions = [user_ids(collection.partition('user_id', i, 3, strategy))
+                  for i in range(3)]
+    assert sorted(sum(partitions, [])) == list(range(20))
+    assert all(partitions)
+    assert len(collection) == 20
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('strategy', ['hash', 'range'])
+def test_model_collection_partitions_filter_queryset(strategy):
+    for i in range(10):
+        Record.objects.create(key='k%s' % i)
+    collection = ModelCollection(Record)
+    partitions = [
+        [item.data.pk for item in
+         collection.partition('id', i, 4, strategy).all()]
+        for i in range(4)]
+    assert sorted(sum(partitions, [])) == \
+        sorted(Record.objects.values_list('pk', flat=True))
+    # the in-memory split agrees with the database one
+    in_memory = Collection([{'id': pk} for pk in
+                            Record.objects.values_list('pk', flat=True)],
+                           item_class=DictItem)
+    assert partitions == [
+        user_ids(in_memory.partition('id', i, 4, strategy), key='id')
+        for i in range(4)]
+
+
+class CitySyncable(BaseSyncable):
+    source = make_collection()
+    target = Collection([], item_class=DictItem)
+    mapping = [lambda source: {'city': source.get('city')}, ]
+    unique_lookup_key = ('user_id', 'user_id')
+
+    def should_sync(self, source, target):
+        return True
+
+
+def test_sync_partition():
+    syncable = CitySyncable()
+    syncable.target = Collection([], item_class=DictItem)
+    syncable.sync(partition=1, of=4)
+    assert user_ids(syncable.target) == [1, 5, 9, 13, 17]
+
+
+@pytest.mark.django_db
+def test_claim_partition_leases_each_partition_once():
+    first = claim_partition('contacts', 2, owner='a')
+    second = claim_partition('contacts', 2, owner='b')
+    assert (first.partition, second.partition) == (0, 1)
+    assert claim_partition('contacts', 2, owner='c') is None
+    assert PartitionLease.objects.filter(syncable='contacts').count() == 2
+
+
+@pytest.mark.django_db
+def test_expired_lease_can_be_reclaimed():
+    lease = claim_partition('contacts', 1, owner='crashed')
+    PartitionLease.objects.filter(pk=lease.pk).update(
+        expires=timezone.now() - datetime.timedelta(seconds=1))
+    reclaimed = claim_partition('contacts', 1, owner='b')
+    assert reclaimed.partition == 0
+    assert reclaimed.owner == 'b'
+    assert not renew_partition(lease)
+    assert renew_partition(reclaimed)
+
+
+@pytest.mark.django_db
+def test_completed_partitions_wait_for_reset():
+    lease = claim_partition('contacts', 1, owner='a')
+    complete_partition(lease)
+    assert claim_partition('contacts', 1, owner='a') is None
+    reset_partitions('contacts', 1)
+    assert claim_partition('contacts', 1, owner='a').partition == 0
+
+
+@pytest.mark.django_db
+def test_sync_partitions():
+    syncable = CitySyncable()
+    syncable.target = Collection([], item_class=DictItem)
+    assert syncable.sync_partitions(of=3, owner='worker') == [0, 1, 2]
+    assert sorted(user_ids(syncable.target)) == list(range(20))
+    assert syncable.sync_partitions(of=3, owner='other') == []
+
+
+def value_mapping(source):
+    return {'value': source.get('value')}
+
+
+class RecordSyncable(BaseSyncable):
+    target = ModelCollection(Record)
+    mapping = [value_mapping, ]
+    unique_lookup_key = ('key', 'key')
+
+    def should_sync(self, source, target):
+        return True
+
+
+@pytest.mark.django_db
+def test_sync_partitions_commits_only_its_partition():
+    for i in range(8):
+        Record.objects.create(key='k%s' % i, value='old')
+    rows = [{'key': 'k%s' % i, 'value': 'new'} for i in range(8)]
+    other = RecordSyncable()
+    other.source = Collection(rows, item_class=DictItem)
+
+    def interleaving_mapping(source):
+        # the other worker syncs and commits its partition while this one
+        # is half way through, with the whole target already loaded
+        other.sync_partitions(of=2, owner='b')
+        return value_mapping(source)
+
+    syncable = RecordSyncable()
+    syncable.source = Collection(rows, item_class=DictItem)
+    syncable.mapping = [interleaving_mapping, ]
+    assert syncable.sync_partitions(of=2, owner='a') == [0]
+    assert set(Record.objects.values_list('value', flat=True)) == {'new'}
+
+
+@pytest.mark.django_db
+def test_sync_partitions_raises_when_lease_lost():
+    syncable = CitySyncable()
+    syncable.target = Collection([], item_class=DictItem)
+
+    def stolen_mapping(source):
+        PartitionLease.objects.update(owner='thief')
+        return {'city': source.get('city')}
+    syncable.mapping = [stolen_mapping, ]
+    with pytest.raises(PartitionLeaseLost):
+        syncable.sync_partitions(of=1, owner='a')
+    assert PartitionLease.objects.get().completed is None
+
+
+@pytest.mark.django_db
+def test_range_bounds_are_fixed_per_round():
+    for i in range(10):
+        Record.objects.create(key='k%s' % i)
+    syncable = RecordSyncable()
+    syncable.source = ModelCollection(Record)
+    syncable.unique_lookup_key = ('id', 'id')
+    syncable.partition_strategy = 'range'
+    lowest = Record.objects.order_by('pk')[0].pk
+
+    first = claim_partition(syncable.get_name(), 2, owner='a',
+                            bounds=lambda: (lowest, lowest + 9))
+    assert (first.range_start, first.range_end) == (None, lowest + 5)
+    # rows added after the leases were made land in the last partition
+    Record.objects.create(key='late')
+    second = claim_partition(syncable.get_name(), 2, owner='b',
+                             bounds=lambda: (0, 1000))
+    assert (second.range_start, second.range_end) == (lowest + 5, None)
+    syncable.sync(partition=second.partition, of=2,
+                  bounds=(second.range_start, second.range_end))
+    assert syncable.result['items'] == 6
+
+
+@pytest.mark.django_db
+def test_hash_partitions_include_negative_keys():
+    for pk in (-5, -4, 1, 2, 3):
+        Record.objects.create(pk=pk, key='k%s' % pk)
+    collection = ModelCollection(Record)
+    partitions = [[item.data.pk for item in
+                   collection.partition('id', i, 2).all()] for i in range(2)]
+    assert sorted(sum(partitions, [])) == [-5, -4, 1, 2, 3]
+    assert partitions == [
+        [pk for pk in (-5, -4, 1, 2, 3) if partition_index(pk, 2) == i]
+        for i in range(2)]
+
+
+def test_partition_needs_integer_field():
+    with pytest.raises(ImproperlyConfigured):
+        ModelCollection(Record).partition('key', 0, 2)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('strategy', ['hash', 'range'])
+def test_partitioned_sync_narrows_target(strategy):
+    pks = [Record.objects.create(key='k%s' % i, value='old').pk
+           for i in range(6)]
+
+    class IdSyncable(RecordSyncable):
+        source = Collection([{'id': pk, 'value': 'new'} for pk in pks],
+                            item_class=DictItem)
+        unique_lookup_key = ('id', 'id')
+        partition_strategy = strategy
+
+    syncable = IdSyncable()
+    target = syncable.sync(partition=1, of=2)
+    synced = sorted(item.get('id') for item in syncable._updated)
+    assert sorted(item.data.pk for item in target.all()) == synced
+    assert 0 < len(synced) < 6
+    target.commit()
+    assert sorted(Record.objects.filter(value='new').values_list(
+        'pk', flat=True)) == synced
+
+
+@pytest.mark.django_db
+def test_partitioned_sync_narrows_target_to_keys():
+    for i in range(6):
+        Record.objects.create(key='k%s' % i, value='old')
+    syncable = RecordSyncable()
+    syncable.source = Collection([{'key': 'k%s' % i, 'value': 'new'}
+                                  for i in range(6)], item_class=DictItem)
+    target = syncable.sync(partition=0, of=2)
+    assert sorted(item.get('key') for item in target.all()) == sorted(
+        'k%s' % i for i in range(6) if partition_index('k%s' % i, 2) == 0)
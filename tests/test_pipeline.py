@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+from syncable.base import BaseSyncable, Collection, DictItem, \
+    ModelCollection
+from syncable.models import QueuedKey, Record
+from syncable.registry import SyncableRegistry, Syncable
+
+
+class RecordingCollection(Collection):
+    item_class = DictItem
+
+    def __init__(self, *args, **kwargs):
+        self.commits = []
+        super(RecordingCollection, self).__init__(*args, **kwargs)
+
+    def commit_items(self, items):
+        self.commits.append(
+            (threading.current_thread().name,
+             [item.get('user_id') for item in items]))
+
+
+def city_mapping(source):
+    return {'city': source.get('city')}
+
+
+def make_syncable(rows=10, **attrs):
+    class CitySyncable(BaseSyncable):
+        source = Collection(
+            [{'user_id': i, 'city': 'City %s' % i} for i in range(rows)],
+            item_class=DictItem)
+        target = RecordingCollection(
+            [{'user_id': i, 'city': ''} for i in range(0, rows, 2)])
+        mapping = [city_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+
+        def should_sync(self, source, target):
+            return source.get('user_id') != 4
+
+    for key, value in attrs.items():
+        setattr(CitySyncable, key, value)
+    return CitySyncable()
+
+
+def test_pipelined_sync_commits_chunks_in_order():
+    syncable = make_syncable()
+    target = syncable.sync(pipeline=True, chunk_size=3)
+
+    assert syncable._committed
+    assert [ids for name, ids in target.commits] == \
+        [[0, 1, 2], [3, 5], [6, 7, 8], [9]]
+    assert set(name for name, ids in target.commits) == \
+        set(['syncable-write'])
+    assert target.get('user_id', 8).get('city') == 'City 8'
+    assert target.get('user_id', 4).get('city') == ''
+    assert [item.get('user_id') for item in syncable._updated] == \
+        [0, 1, 2, 3, 5, 6, 7, 8, 9]
+
+
+def test_pipelined_sync_matches_sequential_sync():
+    sequential = make_syncable(rows=50)
+    pipelined = make_syncable(rows=50)
+    sequential.sync()
+    pipelined.sync(pipeline=True, chunk_size=7, queue_size=1)
+    assert [item.data for item in sequential.target.all()] == \
+        [item.data for item in pipelined.target.all()]
+
+
+def test_pipelined_sync_raises_stage_errors():
+    def broken_mapping(source):
+        if source.get('user_id') == 7:
+            raise ValueError('bad row')
+        return {}
+
+    syncable = make_syncable(rows=1000, mapping=[broken_mapping, ])
+    with pytest.raises(ValueError):
+        syncable.sync(pipeline=True, chunk_size=5, queue_size=1)
+    # Only the chunk synced before the failure can have been committed.
+    assert [ids for name, ids in syncable.target.commits] in \
+        ([], [[0, 1, 2, 3]])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_registry_skips_commit_after_pipelined_sync():
+    class CitySyncable(Syncable):
+        source = Collection([{'user_id': 1, 'city': 'Boston',
+                              'last_updated': 1}], item_class=DictItem)
+        target = RecordingCollection([{'user_id': 1, 'city': ''}])
+        mapping = [city_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+
+    registry = SyncableRegistry()
+    registry.register(CitySyncable, queues=['pipeline'])
+    registry.run(['pipeline'], pipeline=True)
+    assert [ids for name, ids in CitySyncable.target.commits] == [[1]]
+
+
+def value_mapping(source):
+    return {'syncable': source.get('value')}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipelined_model_sync_reads_chunk_by_chunk():
+    class RecordSyncable(BaseSyncable):
+        source = ModelCollection(Record)
+        target = ModelCollection(QueuedKey)
+        mapping = [value_mapping, ]
+        unique_lookup_key = ('key', 'key')
+
+        def should_sync(self, source, target):
+            return True
+
+    for i in range(10):
+        Record.objects.create(key='k%s' % i, value='v%s' % i)
+    QueuedKey.objects.create(key='k3', syncable='old')
+
+    syncable = RecordSyncable()
+    syncable.sync(pipeline=True, chunk_size=4, queue_size=1)
+
+    # neither side was ever loaded whole
+    assert syncable.source._data is None
+    assert syncable.target._data is None
+    assert [chunk['size'] for chunk in syncable.result['chunks']] == \
+        [4, 4, 2]
+    assert sorted(QueuedKey.objects.values_list('key', 'syncable')) == \
+        sorted(('k%s' % i, 'v%s' % i) for i in range(10))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipelined_sync_creates_repeated_keys_once():
+    class QueuedKeySyncable(BaseSyncable):
+        source = Collection([{'key': 'a', 'value': '1'},
+                             {'key': 'b', 'value': '1'},
+                             {'key': 'a', 'value': '2'}], item_class=DictItem)
+        target = ModelCollection(QueuedKey)
+        mapping = [value_mapping, ]
+        unique_lookup_key = ('key', 'key')
+
+        def should_sync(self, source, target):
+            return True
+
+    QueuedKeySyncable().sync(pipeline=True, chunk_size=2)
+    assert sorted(QueuedKey.objects.values_list('key', 'syncable')) == \
+        [('a', '2'), ('b', '1')]
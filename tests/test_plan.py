@@ -0,0 +1,107 @@
+import pytest
+
+from syncable.base import BaseSyncable, Collection, DictItem, Syncable
+from syncable.models import Record
+
+
+def user_mapping(source):
+    return {'city': source.get('city'),
+            'last_updated': source.get('last_updated')}
+
+
+def make_rows(rows):
+    return [{'user_id': i, 'city': 'City %s' % i, 'last_updated': 1}
+            for i in range(rows)]
+
+
+class UserSyncable(Syncable):
+    mapping = [user_mapping, ]
+    unique_lookup_key = ('user_id', 'user_id')
+    watch_key = 'last_updated'
+    chunk_size = 100
+
+
+def make_syncable(source_rows, target_rows, create_new=True):
+    syncable = UserSyncable()
+    syncable.source = Collection(source_rows, item_class=DictItem)
+    syncable.target = Collection(target_rows, item_class=DictItem,
+                                 create_new=create_new)
+    return syncable
+
+
+@pytest.mark.django_db
+def test_plan_writes_nothing():
+    target_rows = [{'user_id': 0, 'city': 'City 0', 'last_updated': 0}]
+    syncable = make_syncable(make_rows(3), target_rows)
+    plan = syncable.sync(plan=True)
+
+    assert plan.creates == [(1, ['city', 'last_updated']),
+                            (2, ['city', 'last_updated'])]
+    assert plan.updates == [(0, ['last_updated'])]
+    assert plan.skips == []
+    assert plan.changes == 3
+    assert len(syncable.target) == 1
+    assert target_rows == [{'user_id': 0, 'city': 'City 0',
+                            'last_updated': 0}]
+    assert Record.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_plan_follows_records():
+    source_rows = make_rows(4)
+    target_rows = [dict(row, city='') for row in make_rows(3)]
+    syncable = make_syncable(source_rows, target_rows, create_new=False)
+    syncable.sync()
+    source_rows[1]['last_updated'] = 2
+
+    plan = syncable.sync(plan=True)
+    assert plan.updates == [(1, ['last_updated'])]
+    assert plan.skips == [0, 2, 3]
+
+    forced = syncable.sync(plan=True, force=True)
+    assert [key for key, fields in forced.updates] == [0, 1, 2]
+    assert forced.updates[0] == (0, [])
+
+
+@pytest.mark.django_db
+def test_records_survive_rebuilt_collections():
+    source_rows = make_rows(4)
+    make_syncable(source_rows, []).sync()
+    source_rows[1]['last_updated'] = 2
+    # new collections over the same data, as after a restart
+    syncable = make_syncable(source_rows, [])
+    syncable.sync()
+    assert [item.get('user_id') for item in syncable._updated] == [1]
+
+
+@pytest.mark.django_db
+def test_plan_fetches_records_in_bulk(django_assert_num_queries):
+    syncable = make_syncable(make_rows(250), make_rows(250))
+    with django_assert_num_queries(3):
+        plan = syncable.sync(plan=True)
+    assert len(plan.updates) == 250
+
+
+@pytest.mark.django_db
+def test_chunked_sync_prefetches_records(django_assert_num_queries):
+    syncable = make_syncable(make_rows(250), make_rows(250))
+    # one prefetch per chunk plus one save per record
+    with django_assert_num_queries(3 + 250):
+        syncable.sync(processes=1)
+    assert Record.objects.count() == 250
+    with django_assert_num_queries(3):
+        syncable.sync(processes=1)
+
+
+def test_plan_with_custom_should_sync():
+    class CitySyncable(BaseSyncable):
+        mapping = [user_mapping, ]
+        unique_lookup_key = ('user_id', 'user_id')
+        source = Collection(make_rows(2), item_class=DictItem)
+        target = Collection([], item_class=DictItem, create_new=False)
+
+        def should_sync(self, source_item, target_item):
+            return True
+
+    plan = CitySyncable().sync(plan=True)
+    assert plan.skips == [0, 1]
@@ -0,0 +1,142 @@
+import pytest
+from django.db import transaction
+
+from syncable.base import Collection, DictItem, ModelCollection, Syncable
+from syncable.models import Record, QueuedKey
+from syncable.push import DatabaseQueue, InProcessQueue
+from syncable.registry import SyncableRegistry
+
+
+def test_in_process_queue_coalesces_keys():
+    queue = InProcessQueue()
+    for key in [1, 2, 1, 3, 2]:
+        queue.put('contacts', key)
+    queue.put('leads', 1)
+    assert len(queue) == 4
+    assert queue.pop_all() == {'contacts': [1, 2, 3], 'leads': [1]}
+    assert queue.pop_all() == {}
+
+
+@pytest.mark.django_db
+def test_database_queue_coalesces_keys():
+    queue = DatabaseQueue()
+    for key in [1, 2, 1, 'a']:
+        queue.put('contacts', key)
+    assert len(queue) == 3
+    assert queue.pop_all() == {'contacts': [1, 2, 'a']}
+    assert QueuedKey.objects.count() == 0
+
+
+def value_mapping(source):
+    return {'value': source.get('value')}
+
+
+def make_push_syncable(queue):
+    class RecordSyncable(Syncable):
+        source = ModelCollection(Record)
+        target = Collection([], item_class=DictItem)
+        mapping = [value_mapping, ]
+        unique_lookup_key = ('key', 'key')
+        push = True
+        push_queue = queue
+
+        def should_sync(self, source_item, target_item):
+            return True
+
+        def post_item_sync(self, source_item, target_item):
+            pass
+    return RecordSyncable
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('queue_class', [InProcessQueue, DatabaseQueue])
+def test_push_syncable_syncs_changed_keys(queue_class):
+    queue = queue_class()
+    RecordSyncable = make_push_syncable(queue)
+    registry = SyncableRegistry()
+    registry.register(RecordSyncable, queues=['push'])
+    try:
+        untouched = Record.objects.create(key='untouched', value='old')
+        queue.pop_all()
+
+        record = Record.objects.create(key='changed', value='first')
+        record.value = 'second'
+        record.save()
+        Record.objects.create(key='deleted').delete()
+        assert len(queue) == 2
+
+        assert registry.flush() == 2
+        target = RecordSyncable.target
+        assert [item.data for item in target.all()] == \
+            [{'key': 'changed', 'value': 'second'}]
+        assert len(queue) == 0
+        assert registry.flush() == 0
+    finally:
+        registry.unregister(RecordSyncable)
+
+    untouched.save()
+    assert len(queue) == 0
+
+
+@pytest.mark.django_db
+def test_flush_leaves_other_registries_keys():
+    queue = InProcessQueue()
+    queue.put('someone.Else', 1)
+    RecordSyncable = make_push_syncable(queue)
+    registry = SyncableRegistry()
+    registry.register(RecordSyncable, queues=['push'])
+    try:
+        assert registry.flush() == 0
+        assert queue.pop_all() == {'someone.Else': [1]}
+    finally:
+        registry.unregister(RecordSyncable)
+
+
+def broken_mapping(source):
+    raise ValueError('bad row')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_flush_requeues_keys():
+    queue = InProcessQueue()
+    RecordSyncable = make_push_syncable(queue)
+    BrokenSyncable = type('BrokenSyncable', (make_push_syncable(queue), ),
+                          {'mapping': [broken_mapping, ]})
+    registry = SyncableRegistry()
+    registry.register([BrokenSyncable, RecordSyncable], queues=['push'])
+    try:
+        Record.objects.create(key='changed', value='new')
+        with pytest.raises(ValueError):
+            registry.flush()
+        # the other syncable was still flushed
+        assert [item.data for item in RecordSyncable.target.all()] == \
+            [{'key': 'changed', 'value': 'new'}]
+        assert queue.pop_all() == {BrokenSyncable().get_name(): ['changed']}
+    finally:
+        registry.unregister([BrokenSyncable, RecordSyncable])
+
+
+class Rollback(Exception):
+    pass
+
+
+@pytest.mark.django_db(transaction=True)
+def test_keys_are_queued_on_commit():
+    queue = InProcessQueue()
+    RecordSyncable = make_push_syncable(queue)
+    registry = SyncableRegistry()
+    registry.register(RecordSyncable, queues=['push'])
+    try:
+        with transaction.atomic():
+            Record.objects.create(key='committed')
+            # a flush now must not sync a row it can't see yet
+            assert len(queue) == 0
+        assert queue.pop_all() == {RecordSyncable().get_name(): ['committed']}
+
+        with pytest.raises(Rollback):
+            with transaction.atomic():
+                Record.objects.create(key='rolled back')
+                raise Rollback
+        assert len(queue) == 0
+    finally:
+        registry.unregister(RecordSyncable)